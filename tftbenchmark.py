@@ -0,0 +1,281 @@
+#!/usr/bin/python
+##################################################################################
+# IMPORTS
+##################################################################################
+import os
+import random
+import threading
+import time
+import pygame
+import pygame.freetype
+from tftutility import *
+
+##################################################################################
+# BENCHMARK CONSTANTS
+##################################################################################
+BENCHMARK_FONTS      = [None, "Fonts/BebasNeue.otf"]
+BENCHMARK_FONT_SIZES = [14, 24]
+BENCHMARK_WIDTHS     = [120, 300, 460]
+BENCHMARK_SEED       = 240
+BENCHMARK_SAMPLES    = 200
+BENCHMARK_REPEAT     = 3
+BENCHMARK_LOOP_TIME  = 5
+BENCHMARK_LOOP_TAPS  = 20
+BENCHMARK_TIMERS     = 200
+BENCHMARK_ATLAS_SIZES = [12, 24, 30]
+BENCHMARK_ATLAS_TEXTS = 400
+BENCHMARK_WORDS      = ["a", "menu", "Traceback", "(most", "recent", "call", "last):", "File", "\"tftmenu.py\",",
+                        "line", "1024,", "in", "render", "Error", "occurred", "while", "attempting", "to", "wrap",
+                        "text.", "pygame.freetype.Font", "supercalifragilisticexpialidocious", "72\xb0F", "-",
+                        "/usr/lib/python2.7/dist-packages/pygame/freetype.py"]
+
+
+##################################################################################
+# REFERENCE WRAP_TEXT_LINE METHOD
+##################################################################################
+# The character by character wrap that wrap_text_line replaced, kept to check the
+# line breaks are the same and to compare the time taken.
+##################################################################################
+def reference_wrap_text_line(font, text, width):
+    text_lines = []
+    text_height = []
+    text_width = []
+    i = 1
+    # A few random words and symbols that have ascenders and descenders
+    max_height = font.get_rect("jet Mopping quiT!([}|/").height
+    while text:
+        font_rect = font.get_rect(text[:i])
+        # Loop through the words until we exceed the width, run out of characters,
+        # run out of spaces or run out of words.
+        while (font_rect.width < width and i < len(text) and "\n" not in text[:i]) or\
+                (" " not in text[:i] and text[:i] is not text):
+            i += 1
+            font_rect = font.get_rect(text[:i])
+        # if we've wrapped the text, then adjust the wrap to the last word
+        if "\n" in text[:i]:
+            i = text.find("\n", 0, i) + 1
+        elif i < len(text):
+            i = text.rfind(" ", 0, i) + 1
+        line_text = text[:i].strip("\n")
+        text_rect = font.get_rect(line_text)
+        text_lines.append(line_text)
+        text_height.append(max_height)
+        text_width.append(text_rect.width)
+        text = text[i:]
+    return text_lines, text_height, text_width
+
+
+##################################################################################
+# GET_SAMPLE_TEXT METHOD
+##################################################################################
+# Returns a random text of the number of words passed in with the odd newline.
+##################################################################################
+def get_sample_text(generator, words):
+    text = u""
+    for index in range(words):
+        text += unicode(generator.choice(BENCHMARK_WORDS), "latin-1")
+        text += u"\n" if generator.random() < 0.05 else u" "
+    return text.rstrip(u" ")
+
+
+##################################################################################
+# TIME_WRAP METHOD
+##################################################################################
+# Returns the best time of BENCHMARK_REPEAT runs of the wrap function over the
+# texts passed in.
+##################################################################################
+def time_wrap(wrap_function, font, texts, width):
+    best = None
+    for repeat in range(BENCHMARK_REPEAT):
+        start_time = time.time()
+        for text in texts:
+            wrap_function(font, text, width)
+        elapsed = time.time() - start_time
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+##################################################################################
+# RUN_BENCHMARK METHOD
+##################################################################################
+# Checks that wrap_text_line breaks a set of random texts the same as the
+# reference wrap and prints the time taken by each for short and long texts.
+# Returns the number of texts that were not wrapped the same.
+##################################################################################
+def run_benchmark():
+    pygame.freetype.init()
+    generator = random.Random(BENCHMARK_SEED)
+    mismatches = 0
+    checked = 0
+    for font_path in BENCHMARK_FONTS:
+        for font_size in BENCHMARK_FONT_SIZES:
+            font = FontCache.get_font(font_path, font_size)
+            for width in BENCHMARK_WIDTHS:
+                for sample in range(BENCHMARK_SAMPLES):
+                    text = get_sample_text(generator, generator.randint(0, 40))
+                    checked += 1
+                    if wrap_text_line(font, text, width) != reference_wrap_text_line(font, text, width):
+                        mismatches += 1
+                        print("Line breaks differ.  Font: {0}, Size: {1}, Width: {2}, Text: {3!r}".format(
+                            font_path, font_size, width, text))
+    print("Compared {0} texts, {1} differed.".format(checked, mismatches))
+    font = FontCache.get_font(None, BENCHMARK_FONT_SIZES[0])
+    width = BENCHMARK_WIDTHS[1]
+    print("{0:>8} {1:>12} {2:>12} {3:>8}".format("Words", "Reference", "Wrap", "Speedup"))
+    for words in [10, 50, 200, 800]:
+        texts = [get_sample_text(generator, words) for sample in range(5)]
+        reference_time = time_wrap(reference_wrap_text_line, font, texts, width)
+        wrap_time = time_wrap(wrap_text_line, font, texts, width)
+        print("{0:>8} {1:>11.4f}s {2:>11.4f}s {3:>7.1f}x".format(words, reference_time, wrap_time,
+                                                              reference_time / max(wrap_time, 1e-9)))
+    return mismatches
+
+
+##################################################################################
+# GET_ATLAS_TEXT METHOD
+##################################################################################
+# Returns a random text of the length passed in made of the GlyphAtlas
+# characters.
+##################################################################################
+def get_atlas_text(generator, length):
+    return u"".join(generator.choice(GlyphAtlas.charset) for index in range(length))
+
+
+##################################################################################
+# RUN_ATLAS_CHECK METHOD
+##################################################################################
+# Checks that updating the last GlyphAtlas surface in place gives the same pixels
+# as rendering the text with the font.  Each text is followed by one that is the
+# same length, with some characters changed or shuffled, so the in-place update
+# is tried.  Returns the number of renders that differed.
+##################################################################################
+def run_atlas_check():
+    pygame.freetype.init()
+    generator = random.Random(BENCHMARK_SEED)
+    mismatches = 0
+    checked = 0
+    for font_path in BENCHMARK_FONTS:
+        for font_size in BENCHMARK_ATLAS_SIZES:
+            font = FontCache.get_font(font_path, font_size)
+            font.pad = False
+            atlas = GlyphAtlas.get_atlas(font, (255, 255, 255))
+            last_surface = None
+            last_text = None
+            for sample in range(BENCHMARK_ATLAS_TEXTS):
+                if last_text is not None and generator.random() < 0.5:
+                    text = list(last_text)
+                    generator.shuffle(text)
+                    text = u"".join(text)
+                else:
+                    text = get_atlas_text(generator, 8)
+                rendered = atlas.render(text, last_surface, last_text)
+                if rendered is None:
+                    last_surface = None
+                    last_text = None
+                    continue
+                checked += 1
+                font_surface = font.render(text, fgcolor=(255, 255, 255))[0]
+                if pygame.image.tostring(rendered[0], "RGBA") != pygame.image.tostring(font_surface, "RGBA"):
+                    mismatches += 1
+                    print("Atlas render differs.  Font: {0}, Size: {1}, Text: {2!r} -> {3!r}".format(
+                        font_path, font_size, last_text, text))
+                last_surface, last_text = rendered[0], text
+    print("Checked {0} atlas renders, {1} differed.".format(checked, mismatches))
+    return mismatches
+
+
+##################################################################################
+# POST_TAPS METHOD
+##################################################################################
+# Posts taps (mouse button down events) spread over the time passed in and adds
+# the time each was posted to the list passed in.
+##################################################################################
+def post_taps(duration, taps, tap_times):
+    for tap in range(taps):
+        time.sleep(float(duration) / (taps + 1))
+        tap_times.append(time.time())
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(0, 0)))
+
+
+##################################################################################
+# TIME_LOOP METHOD
+##################################################################################
+# Runs a main loop that only waits for events in the loop mode passed in for
+# BENCHMARK_LOOP_TIME seconds while taps are posted from another thread.  Returns
+# the number of wakeups, the CPU time used and the latency of each tap.
+##################################################################################
+def time_loop(loop_mode):
+    EventLoop.mode = loop_mode
+    EventLoop.wakeups = 0
+    pygame.event.clear()
+    tap_times = []
+    latencies = []
+    tapper = threading.Thread(target=post_taps, args=(BENCHMARK_LOOP_TIME, BENCHMARK_LOOP_TAPS, tap_times))
+    start_cpu = sum(os.times()[:2])
+    end_time = time.time() + BENCHMARK_LOOP_TIME
+    tapper.start()
+    while time.time() < end_time:
+        for event in EventLoop.wait(end_time - time.time()):
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                latencies.append(time.time() - tap_times[len(latencies)])
+    tapper.join()
+    return EventLoop.wakeups, sum(os.times()[:2]) - start_cpu, latencies
+
+
+##################################################################################
+# RUN_LOOP_BENCHMARK METHOD
+##################################################################################
+# Prints the wakeups per second, CPU time and tap latency of the main loop in
+# each loop mode.
+##################################################################################
+def run_loop_benchmark():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    print("{0:>8} {1:>12} {2:>8} {3:>14} {4:>13}".format("Mode", "Wakeups/s", "CPU", "Mean Latency", "Max Latency"))
+    for name, loop_mode in [("Poll", LoopMode.Poll), ("Event", LoopMode.Event)]:
+        wakeups, cpu_time, latencies = time_loop(loop_mode)
+        print("{0:>8} {1:>12.1f} {2:>7.3f}s {3:>12.1f}ms {4:>11.1f}ms".format(
+            name, float(wakeups) / BENCHMARK_LOOP_TIME, cpu_time,
+            1000 * sum(latencies) / max(len(latencies), 1), 1000 * max(latencies or [0])))
+    EventLoop.mode = LoopMode.Poll
+
+
+##################################################################################
+# RUN_TIMER_BENCHMARK METHOD
+##################################################################################
+# Sets BENCHMARK_TIMERS timers spread over BENCHMARK_LOOP_TIME seconds, runs an
+# event mode loop until they have all been called and prints the wakeups and how
+# late the timers were called.  Also prints the time taken to reset a timer.
+##################################################################################
+def run_timer_benchmark():
+    generator = random.Random(BENCHMARK_SEED)
+    EventLoop.mode = LoopMode.Event
+    EventLoop.wakeups = 0
+    lateness = []
+    for index in range(BENCHMARK_TIMERS):
+        delay = generator.uniform(0, BENCHMARK_LOOP_TIME)
+        Timers.add(delay, lambda deadline: lateness.append(monotonic() - deadline), monotonic() + delay)
+    while len(lateness) < BENCHMARK_TIMERS:
+        EventLoop.wait(Timers.get_remaining())
+        Timers.run()
+    EventLoop.mode = LoopMode.Poll
+    entry = Timers.add(BENCHMARK_LOOP_TIME, None)
+    start_time = time.time()
+    for index in range(10000):
+        entry.reset()
+    reset_time = (time.time() - start_time) / 10000
+    entry.cancel()
+    print("{0:>8} {1:>12} {2:>14} {3:>13} {4:>10}".format("Timers", "Wakeups", "Mean Lateness", "Max Lateness",
+                                                          "Reset"))
+    print("{0:>8} {1:>12} {2:>12.1f}ms {3:>11.1f}ms {4:>8.1f}us".format(
+        BENCHMARK_TIMERS, EventLoop.wakeups, 1000 * sum(lateness) / len(lateness), 1000 * max(lateness),
+        1000000 * reset_time))
+
+
+if __name__ == "__main__":
+    run_benchmark()
+    run_atlas_check()
+    run_loop_benchmark()
+    run_timer_benchmark()
@@ -2,7 +2,6 @@
 ##################################################################################
 # IMPORTS
 ##################################################################################
-import signal
 import time
 from functools import partial
 
@@ -80,63 +79,68 @@ GPIO_BACKLIGHT_CHANGE_STEPS_MAX = GPIO_BACKLIGHT_HIGH
 ##################################################################################
 # TIMER CLASS
 ##################################################################################
+# Class for the screen timeout of the current display, kept as a TimerEntry on
+# the Timers monotonic clock.  Resetting the timeout (on every touch) only moves
+# the deadline of the entry.  When the entry comes due on the main loop, the
+# timer is marked as triggered, which is detected in the is_expired method.
+##################################################################################
 class Timer:
 
     __timeout      = 0
-    __alarmed      = False
+    __entry        = None
     __triggered    = False
     __abort        = False
     __ignore_reset = False
 
     ##################################################################################
-    # TIMER ALARM METHOD
+    # TIMER EXPIRE METHOD
     ##################################################################################
-    # Method called from a system Alarm signal.  When an alarm occurs, the __triggered
-    # variable is set to True and can be detected in the is_expired method.
+    # Method called by Timers when the timeout is reached.  The __triggered variable
+    # is set to True and can be detected in the is_expired method.
     ##################################################################################
     @classmethod
-    def alarm(cls, signum, frame):
-        logger.debug("Alarm Signal Received.  Signum: {0}, Frame: {1}".format(signum, frame))
+    def expire(cls):
+        logger.debug("Timer expired.  Timeout: {0}".format(cls.__timeout))
         cls.__triggered = True
         cls.__ignore_reset = False
-        signal.alarm(0)
 
     ##################################################################################
     # TIMER RESET METHOD
     ##################################################################################
-    # Method to reset the Alarm signal timer
+    # Method to restart the timeout from now
     ##################################################################################
     @classmethod
     def reset(cls):
         if not cls.__ignore_reset:
             logger.debug("Timer reset")
             cls.__triggered = False
-            signal.alarm(0)
-            signal.alarm(cls.__timeout)
+            if cls.__entry is None:
+                cls.__entry = TimerEntry(cls.expire)
+            if cls.__timeout > 0:
+                Timers.schedule(cls.__entry, cls.__timeout)
+            else:
+                Timers.cancel(cls.__entry)
         else:
             logger.debug("Timer reset ignored.")
 
     ##################################################################################
     # TIMER TIMEOUT METHOD
     ##################################################################################
-    # Method that initially sets the Alarm signal callback.  The ignore_reset
-    # parameter can be set to True to ignore reset signals.
+    # Method that sets the timeout in seconds (fractions of a second can be used, 0
+    # for no timeout) and starts it.  The ignore_reset parameter can be set to True
+    # to ignore reset signals.
     ##################################################################################
     @classmethod
     def timeout(cls, timeout, ignore_reset=False):
         logger.debug("Timeout set.  Timeout: {0}, Ignore Reset: {1}".format(timeout, ignore_reset))
         cls.__timeout = timeout
-        if not cls.__alarmed:
-            signal.signal(signal.SIGALRM, Timer.alarm)
-            cls.__alarmed = True
-            logger.debug("Alarm Signal Initialized")
         cls.reset()
         cls.__ignore_reset = ignore_reset
 
     ##################################################################################
     # TIMER IS_EXPIRED METHOD
     ##################################################################################
-    # Method to detect if a timer alarm has occurred.
+    # Method to detect if the timeout has been reached.
     ##################################################################################
     @classmethod
     def is_expired(cls):
@@ -146,6 +150,22 @@ class Timer:
             cls.reset()
             return True
 
+    ##################################################################################
+    # TIMER GET_REMAINING METHOD
+    ##################################################################################
+    # Method that returns the number of seconds until the timeout is reached, 0 if it
+    # has already been reached or None if no timeout is set.
+    ##################################################################################
+    @classmethod
+    def get_remaining(cls):
+        if cls.__timeout == 0:
+            return None
+        if cls.__triggered:
+            return 0
+        if cls.__entry is None:
+            return None
+        return cls.__entry.get_remaining()
+
 
 ##################################################################################
 # BACKLIGHT CLASS
@@ -573,6 +593,17 @@ class GpioButtons(object):
                     elif action_function.action == GpioButtonAction.Execute:
                         run_cmd(action_function.data)
 
+    ##################################################################################
+    # BUTTONS GPIO_EVENT METHOD
+    ##################################################################################
+    # Method called by the GPIO.add_event_detect on the GPIO thread.  The button
+    # press is passed to the main loop (see EventLoop.post) to be run by
+    # gpio_button.
+    ##################################################################################
+    @classmethod
+    def gpio_event(cls, button, actions, channel):
+        EventLoop.post(cls.gpio_button, button, actions, channel)
+
     ##################################################################################
     # BUTTONS INIT METHOD
     ##################################################################################
@@ -681,6 +712,8 @@ class GpioButtons(object):
         GPIO.setmode(GPIO.BCM)
         if self.battery_gpio is not DEFAULT_PI_BATTERY_GPIO:
             GPIO.setup(self.battery_gpio, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            # Wake the main loop when the battery goes low, so it is checked without polling
+            GPIO.add_event_detect(self.battery_gpio, GPIO.FALLING, callback=lambda channel: EventLoop.wake())
         if self.actions:
             for button in self.buttons:
                 GPIO.setup(button, GPIO.IN, pull_up_down=GPIO.PUD_UP)
@@ -690,7 +723,7 @@ class GpioButtons(object):
                 if action_count < len(self.actions):
                     button_actions = self.actions[action_count]
                     GPIO.add_event_detect(button, GPIO.RISING,
-                                          callback=partial(GpioButtons.gpio_button, action_count, button_actions),
+                                          callback=partial(GpioButtons.gpio_event, action_count, button_actions),
                                           bouncetime=Times.SwitchBounce)
                 action_count += 1
             GpioButtons.gpio_initialized = True
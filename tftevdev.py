@@ -7,7 +7,7 @@ import pygame
 from Queue import Queue
 from threading import Thread, Event
 from pygame.locals import *
-from tftutility import logger, Screen
+from tftutility import logger, Screen, EventLoop
 
 
 # Class for handling events from piTFT
@@ -75,6 +75,7 @@ class TftTouchscreen(Thread):
                     event['time'] = input_event.timestamp()
                     print("{}".format(event))
                     self.events.put(event)
+                    EventLoop.wake()
                     e = event
                     event = {'x': e['x'], 'y': e['y']}
                     try:
@@ -13,7 +13,6 @@ from tftvantage import Vantage
 
 class Weather:
     weather_data = None
-    current_wx_last_update = None
 
     ##################################################################################
     # GET WEATHER FUNCTION
@@ -58,28 +57,37 @@ class Weather:
             print ("Sunrise", time.strftime("%I:%M%P", time.localtime(cls.weather_data['sunrise'])))
             print ("Sunset", time.strftime("%I:%M%P", time.localtime(cls.weather_data['sunset'])))
 
+    ##################################################################################
+    # UPDATE CURRENT WEATHER FUNCTION
+    ##################################################################################
+    # Timer function that gets the current weather once a minute and marks the
+    # current weather draw function to be called with the new data.
+    ##################################################################################
     @classmethod
-    def draw_current_weather(cls, screen, display):
-        if screen is None or display is None:
-            return
-        cur_time = int(time.time())
-        if cls.current_wx_last_update is not None:
-            if cls.current_wx_last_update + 60 > cur_time:
-                return
+    def update_current_weather(cls):
         if cls.get_current_weather():
             cls.get_weather_details()
-            cls.current_wx_last_update = cur_time
+            dialogCurrentWx.set_draw_dirty(cls.draw_current_weather)
 
+    ##################################################################################
+    # DRAW CURRENT WEATHER FUNCTION
+    ##################################################################################
+    # Draw function for the current weather dialog.  Only draws the weather data
+    # already fetched by update_current_weather, so showing the dialog does not get
+    # the weather again.
+    ##################################################################################
+    @classmethod
+    def draw_current_weather(cls, screen, display):
+        if screen is None or display is None:
+            return
         if DisplayResolution is DisplayResolution.Small320x240:
-            newrect = draw_true_rect(Displays.screen, Color.Green, display.border_width - 1, display.border_width - 1,
-                                     Defaults.tft_width - display.border_width,
-                                     Defaults.tft_height - display.border_width, 0)
-            pygame.display.update(newrect)
+            return draw_true_rect(Displays.screen, Color.Green, display.border_width - 1, display.border_width - 1,
+                                  Defaults.tft_width - display.border_width,
+                                  Defaults.tft_height - display.border_width, 0)
         else:
-            newrect = draw_true_rect(Displays.screen, Color.Green, display.border_width - 1, display.border_width - 1,
-                                     Defaults.tft_width - (display.border_width * 2),
-                                     Defaults.tft_height - (display.border_width * 2), 0)
-            pygame.display.update(newrect)
+            return draw_true_rect(Displays.screen, Color.Green, display.border_width - 1, display.border_width - 1,
+                                  Defaults.tft_width - (display.border_width * 2),
+                                  Defaults.tft_height - (display.border_width * 2), 0)
 
 
 ##################################################################################
@@ -145,7 +153,7 @@ dialogCurrentWxText = [DialogLine("", font_size=30, font_pad=False)]
 dialogCurrentWxActions = [Action(DisplayAction.Back)]
 dialogCurrentWx = Dialog(dialogCurrentWxText, DialogStyle.FullScreenOk, Color.Black, Color.Blue,
                          actions=dialogCurrentWxActions, use_menu_timeout=True,
-                         draw_callback=Weather.draw_current_weather)
+                         draw_callback=DrawCallback(Weather.draw_current_weather, on_dirty=True))
 Displays.menus["CurrentWx"] = dialogCurrentWx
 
 # Forecast Weather Dialog
@@ -169,5 +177,14 @@ dialogRadarWx = Dialog(dialogRadarWxText, DialogStyle.FullScreenOk, Color.Black,
                        actions=dialogRadarWxActions, use_menu_timeout=True)
 Displays.menus["RadarWx"] = dialogRadarWx
 
+##################################################################################
+# WEATHER TIMERS
+##################################################################################
+# Gets the current weather once the menu is started and then once a minute.
+# The current weather draw function is only called when new data is fetched or
+# the dialog is shown.
+Timers.add(0, Weather.update_current_weather)
+Timers.add_repeating(60, Weather.update_current_weather)
+
 Displays.start(initial_menu="Main", backlight_method=BacklightMethod.Pwm, backlight_restore_last=True,
                backlight_state_sleep=True, backlight_auto=True, use_old_pwm=use_old_pwm)
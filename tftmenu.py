@@ -4,6 +4,7 @@
 ##################################################################################
 import fcntl
 import sys
+import threading
 import pygame.display
 import pygame.freetype
 
@@ -52,6 +53,11 @@ class Displays:
     libsdl_version = None
     libsdl_build = None
     event_device = None
+    prerender_thread = None
+    splash_prerender = False
+    font_preload = False
+    font_preload_thread = None
+    screen_dark = False
 
     ##################################################################################
     # DISPLAYS SHOW METHOD
@@ -68,11 +74,21 @@ class Displays:
             if item in cls.menus:
                 display = cls.menus[item]
         if display is not None:
-            if cls.current is None or display is not cls.current.last:
+            # Showing the current display again (like after a button function) keeps
+            # the display it came from.
+            if cls.current is None or (display is not cls.current and display is not cls.current.last):
                 display.last = cls.current
                 if display.is_core:
                     Displays.last = display
-            display.render(data)
+            # Draw functions are called again once the display is painted.  This runs
+            # on the main loop, which is awake, so the loop is not woken for them.
+            if display is not cls.current or display.force_refresh:
+                for callback in display.draw_callback:
+                    callback.dirty = True
+            # A modal dialog returning to the display it was shown over only needs
+            # to put back the part of the screen it covered.
+            if not (isinstance(cls.current, Dialog) and cls.current.restore(display)):
+                display.render(data)
             cls.current = display
         else:
             logger.warning("Unable to get valid display to show.  Item: {0}, Data: {1}".format(item, data))
@@ -85,6 +101,7 @@ class Displays:
     ##################################################################################
     @classmethod
     def show_splash(cls, splash_type, data=None):
+        cls.wait_prerender()
         if splash_type == SplashBuiltIn.Exit:
             if not cls.splash_mute_level & SplashMuteLevel.Exit:
                 cls.show(SplashBuiltIn.Exit, data)
@@ -155,7 +172,7 @@ class Displays:
             logger.debug("Shutting down while in shelled mode.")
             if Defaults.tft_type is not DISP22NT:
                 pygame.mouse.set_visible(False)
-            Displays.screen = pygame.display.set_mode(Defaults.tft_size)
+            Displays.screen = Surfaces.set_mode(Defaults.tft_size)
         if method == Shutdown.Terminate:
             draw_true_rect(Displays.screen, Color.Black, 0, 0, Defaults.tft_width, Defaults.tft_height, 0)
             pygame.display.flip()
@@ -243,8 +260,9 @@ class Displays:
         send_wake_command()
         if Defaults.tft_type is not DISP22NT:
             pygame.mouse.set_visible(False)
-        Displays.screen = pygame.display.set_mode(Defaults.tft_size)
+        Displays.screen = Surfaces.set_mode(Defaults.tft_size)
         return_display = cls.get_last_core_display(Displays.shelled)
+        return_display.fingerprint = None
         return_display.force_refresh = True
         Displays.show(return_display)
         cls.loop_mode_shelled = False
@@ -311,12 +329,20 @@ class Displays:
     ##################################################################################
     # Classmethod to initialize Displays class.  Sets any defaults, the mute level of
     # Splash displays and then the splash displays.  Also initializes pygame and the
-    # touchscreen drivers.
+    # touchscreen drivers.  If splash_prerender is set, the built-in splash displays
+    # are rendered ahead of time (on a background thread if splash_prerender_thread
+    # is also set) so showing one during a shutdown or error is only a blit, and
+    # every splash keeps its full screen surface once it is rendered.  Otherwise
+    # splashes are drawn straight to the screen.  The surface_cache_budget is the
+    # number of bytes all of the retained surfaces may use (0 for no limit, see
+    # SurfaceCache).  If font_preload is set, the fonts used by the menus are loaded
+    # on a background thread once the menus are started (see preload_fonts).
     @classmethod
     def initialize(cls, tft_type, global_background_color=None, global_border_width=None, global_border_color=None,
                    global_font=None, global_font_size=None, global_font_color=None, global_font_h_padding=None,
                    global_font_v_padding=None, global_font_h_align=None, global_font_v_align=None,
-                   splash_mute_level=SplashMuteLevel.NoMute, splash_timeout=Defaults.DEFAULT_SPLASH_TIMEOUT_MEDIUM):
+                   splash_mute_level=SplashMuteLevel.NoMute, splash_timeout=Defaults.DEFAULT_SPLASH_TIMEOUT_MEDIUM,
+                   splash_prerender=False, splash_prerender_thread=False, surface_cache_budget=0, font_preload=False):
 
         # If a touch device is specified, make sure the LibSdl version is correct.  If
         # not, display a warning unless suppressed.
@@ -324,6 +350,8 @@ class Displays:
             cls.check_lib_sdl_version()
 
         cls.splash_mute_level = splash_mute_level
+        cls.font_preload = font_preload
+        SurfaceCache.set_budget(surface_cache_budget)
         # Set the defaults based on the resolution of the display.  Fonts are scaled
         # using the font resolutions setting which provides similar sized fonts for
         # both the small and large displays.
@@ -396,23 +424,197 @@ class Displays:
             cls.event_device.start(90)
         if Defaults.tft_type is not DISP22NT:
             pygame.mouse.set_visible(False)
+        cls.splash_prerender = splash_prerender
+        if splash_prerender:
+            if splash_prerender_thread:
+                cls.prerender_thread = threading.Thread(target=cls.prerender_splashes, name="SplashPrerender")
+                cls.prerender_thread.daemon = True
+                cls.prerender_thread.start()
+            else:
+                cls.prerender_splashes()
         logger.info("Initialization complete")
         cls.initialized = True
 
+    ##################################################################################
+    # DISPLAYS PRERENDER_SPLASHES METHOD
+    ##################################################################################
+    # Classmethod that renders each of the splash displays (only the built-in ones
+    # exist during initialize) to a full screen surface so they can be shown with a
+    # single blit.
+    ##################################################################################
+    @classmethod
+    def prerender_splashes(cls):
+        start_time = time.time()
+        for name, display in cls.menus.items():
+            if isinstance(display, Splash):
+                try:
+                    display.prerender()
+                except Exception, ex:
+                    logger.warning("Unable to pre-render splash.  Splash: {0}, Error: {1}".format(name, ex))
+        logger.debug("Built-in splashes pre-rendered in {0:.3f} seconds".format(time.time() - start_time))
+
+    ##################################################################################
+    # DISPLAYS WAIT_PRERENDER METHOD
+    ##################################################################################
+    # Classmethod that waits for the splash pre-render thread (if any) to finish so
+    # the main thread and the pre-render thread never render text at the same time.
+    # Once the display mode is set, the pre-rendered surfaces are converted to the
+    # screen pixel format.
+    ##################################################################################
+    @classmethod
+    def wait_prerender(cls):
+        if cls.prerender_thread is not None and cls.prerender_thread is not threading.current_thread():
+            cls.prerender_thread.join()
+            cls.prerender_thread = None
+        if Surfaces.screen is not None:
+            for display in cls.menus.values():
+                if isinstance(display, Splash):
+                    display.convert_surfaces()
+
+    ##################################################################################
+    # DISPLAYS GET_FONTS METHOD
+    ##################################################################################
+    # Classmethod that returns a list of the distinct font, size and style tuples
+    # used by the text lines of the displays passed in.
+    ##################################################################################
+    @classmethod
+    def get_fonts(cls, displays):
+        fonts = []
+        for display in displays:
+            if isinstance(display, Display):
+                for line in display.get_lines():
+                    if isinstance(line, BaseLine) and line.font_size is not None:
+                        fonts.append((line.font, line.font_size, line.font_style))
+        return remove_duplicates(fonts)
+
+    ##################################################################################
+    # DISPLAYS START_FONT_PRELOAD METHOD
+    ##################################################################################
+    # Classmethod that starts the background thread that loads the fonts used by
+    # the registered menus, apart from those of the initial menu, which are loaded
+    # when it is shown.
+    ##################################################################################
+    @classmethod
+    def start_font_preload(cls, initial_menu):
+        initial_display = initial_menu if isinstance(initial_menu, Display) else cls.menus.get(initial_menu)
+        initial_fonts = cls.get_fonts([initial_display])
+        fonts = [font for font in cls.get_fonts(cls.menus.values()) if font not in initial_fonts]
+        if not fonts:
+            return
+        cls.font_preload_thread = threading.Thread(target=cls.preload_fonts, args=(fonts,), name="FontPreload")
+        cls.font_preload_thread.daemon = True
+        cls.font_preload_thread.start()
+
+    ##################################################################################
+    # DISPLAYS PRELOAD_FONTS METHOD
+    ##################################################################################
+    # Classmethod that loads each of the font, size and style tuples passed in into
+    # the FontCache along with its FontMetrics table, so the first render of a menu
+    # does not have to load its fonts.  Each font is loaded while holding the
+    # FontCache lock, which rendering also holds, so a font is never used by both
+    # threads at once.
+    ##################################################################################
+    @classmethod
+    def preload_fonts(cls, fonts):
+        start_time = time.time()
+        logger.debug("Preloading {0} fonts".format(len(fonts)))
+        for index, (font, size, style) in enumerate(fonts):
+            font_start_time = time.time()
+            try:
+                with FontCache.lock:
+                    FontMetrics.get_metrics(FontCache.get_font(font, size, style))
+            except Exception, ex:
+                logger.warning("Unable to preload font.  Font: {0}, Size: {1}, Error: {2}".format(font, size, ex))
+                continue
+            logger.debug("Preloaded font {0} of {1}.  Font: {2}, Size: {3}, Time: {4:.3f} seconds".format(
+                index + 1, len(fonts), font, size, time.time() - font_start_time))
+        logger.info("Preloaded {0} fonts in {1:.3f} seconds".format(len(fonts), time.time() - start_time))
+
+    ##################################################################################
+    # DISPLAYS GET_WAIT_TIMEOUT METHOD
+    ##################################################################################
+    # Classmethod that returns the number of seconds the main loop can wait for
+    # events before it has something to do on its own: the next timer (like the
+    # screen timeout, see Timers), the next refresh of the headers and footers
+    # (every pass for those that refresh all the time), the next call of the draw
+    # functions (see DrawCallback) and none while there are displays to pre-render
+    # (when idle is True, as pre-rendering only runs when no button is held down).
+    # Only the timers count while the screen is dark or shelled.  None is returned
+    # if there is nothing to wait for.
+    ##################################################################################
+    @classmethod
+    def get_wait_timeout(cls, idle=True):
+        if cls.current is None:
+            return None
+        if cls.loop_mode_shelled or cls.screen_dark:
+            return Timers.get_remaining()
+        if idle and Prerenderer.has_work():
+            return 0
+        timeouts = []
+        remaining = Timers.get_remaining()
+        if remaining is not None:
+            timeouts.append(remaining)
+        now = time.time()
+        draw_wait = cls.current.get_draw_wait(monotonic())
+        if draw_wait is not None:
+            timeouts.append(draw_wait)
+        for headfoot in cls.current.get_headfoots():
+            if headfoot.refresh == DisplayHeaderRefresh.All:
+                return Times.SleepLoop
+            update_wait = headfoot.get_update_wait(now)
+            if update_wait is not None:
+                timeouts.append(update_wait)
+        return min(timeouts) if timeouts else None
+
+    ##################################################################################
+    # DISPLAYS UPDATE_SCREEN_DARK METHOD
+    ##################################################################################
+    # Classmethod called by the main loop that checks if the backlight is off.
+    # When the screen goes dark, the Compositor is suspended so nothing is pushed
+    # to it.  When it comes back on, the dynamic headers and footers and the draw
+    # functions of the current display are brought up to date and everything is
+    # pushed to the screen in a single present.  Returns True if the loop should
+    # skip its display updates this pass (the screen is dark or was just brought
+    # up to date).
+    ##################################################################################
+    @classmethod
+    def update_screen_dark(cls):
+        screen_dark = Backlight.method != BacklightMethod.NoBacklight and Backlight.is_screen_sleeping()
+        if screen_dark == cls.screen_dark:
+            return screen_dark
+        cls.screen_dark = screen_dark
+        if screen_dark:
+            logger.debug("Screen dark.  Display updates suspended.")
+            Compositor.suspend()
+        else:
+            for headfoot in cls.current.get_headfoots():
+                if not headfoot.is_static():
+                    headfoot.render(cls.current, True)
+            cls.current.draw()
+            logger.debug("Screen awake.  Display updates resumed.  Pixels: {0}".format(Compositor.resume()))
+        return True
+
     ##################################################################################
     # DISPLAYS START METHOD
     ##################################################################################
     # Classmethod called to start the menu Displays.   The initial menu needs to be
     # passed it, along with any settings for the backlight.  The main execution loop
-    # then follows.
+    # then follows.  If idle_prerender is set, the loop uses idle time to prepare
+    # the displays one tap away from the current one (see Prerenderer).  The
+    # loop_mode sets whether the loop polls for events or waits for them (see
+    # LoopMode and EventLoop).
     @classmethod
     def start(cls, initial_menu, backlight_method=None, backlight_steps=None, backlight_default=None,
               backlight_restore_last=False, backlight_state_sleep=False, backlight_auto=False, button_callback=None,
-              power_gpio=None, use_old_pwm=False, battery_gpio=None):
+              power_gpio=None, use_old_pwm=False, battery_gpio=None, idle_prerender=False,
+              loop_mode=LoopMode.Poll):
         # Make sure start process has not already started.
         if cls.started:
             return
         cls.started = True
+        if idle_prerender:
+            Prerenderer.enabled = True
+        EventLoop.mode = loop_mode
         button_down = 0
         down_time = None
         # Make sure initialization has been run
@@ -424,8 +626,13 @@ class Displays:
         signal.signal(signal.SIG_IGN, cls.on_shutdown)
         signal.signal(signal.SIGINT, cls.on_shutdown)
         signal.signal(signal.SIGTERM, cls.on_shutdown)
+        if EventLoop.is_event_mode():
+            EventLoop.watch_signals()
         # Set display mode in pygame and set
-        cls.screen = pygame.display.set_mode(Defaults.tft_size)
+        cls.screen = Surfaces.set_mode(Defaults.tft_size)
+        cls.wait_prerender()
+        if cls.font_preload:
+            cls.start_font_preload(initial_menu)
         try:
             # Create TFTButtons
             tft_buttons = GpioButtons(Defaults.tft_type, backlight_method=backlight_method,
@@ -446,9 +653,14 @@ class Displays:
             while cls.loop:
                 if Defaults.tft_type is DISP28C or Defaults.tft_type is DISP28CP:
                     cls.event_device.run()
+                # Wait for touchscreen and keyboard events (see EventLoop) and run anything
+                # passed to the loop by other threads
+                events = EventLoop.wait(cls.get_wait_timeout(button_down == 0),
+                                        Times.SleepLoopDark if cls.screen_dark else None)
+                EventLoop.run_tasks()
+                Timers.run()
                 if not cls.loop_mode_shelled:
-                    # Scan touchscreen and keyboard events
-                    for event in pygame.event.get():
+                    for event in events:
                         # Mouse down or touch on screen
                         if event.type == MOUSEBUTTONDOWN:
                             Timer.reset()
@@ -513,15 +725,23 @@ class Displays:
                         if cls.current.timeout_function is not None:
                             for timeout_function in cls.current.timeout_function:
                                 timeout_function()
-                    # If the display has a header attribute, call header update which will take
-                    # care of refreshing the header if necessary
-                    if hasattr(cls.current, Attributes.Header) and cls.current.header is not None:
-                        cls.current.header.update(cls.current)
-                    if hasattr(cls.current, Attributes.Footer) and cls.current.footer is not None:
-                        cls.current.footer.update(cls.current)
-                    cls.current.draw()
+                    # Headers, footers, draw functions and pre-rendering are suspended while
+                    # the screen is dark (see update_screen_dark)
+                    if not cls.update_screen_dark():
+                        # If the display has a header attribute, call header update which will
+                        # take care of refreshing the header if necessary
+                        if hasattr(cls.current, Attributes.Header) and cls.current.header is not None:
+                            cls.current.header.update(cls.current)
+                        if hasattr(cls.current, Attributes.Footer) and cls.current.footer is not None:
+                            cls.current.footer.update(cls.current)
+                        cls.current.draw()
+                        # Push anything drawn by the headers, footers and draw functions
+                        Compositor.present()
+                        # Use idle time to prepare the displays one tap away
+                        if not events and button_down == 0:
+                            Prerenderer.run()
                 else:
-                    for event in pygame.event.get():
+                    for event in events:
                         # Mouse up or release on screen
                         if event.type == MOUSEBUTTONDOWN:
                             down_time = time.time()
@@ -531,8 +751,6 @@ class Displays:
                 if tft_buttons.is_low_battery():
                     exit_splash = SplashBuiltIn.Battery
                     cls.shutdown(Shutdown.Shutdown, exit_splash)
-                # Sleep for a bit
-                time.sleep(Times.SleepLoop)
             cls.shutdown(Shutdown.Normal)
         # Catch Ctl-C Exit so error is not displayed
         except KeyboardInterrupt:
@@ -561,6 +779,127 @@ class ShutdownInterrupt(Exception):
     pass
 
 
+##################################################################################
+# TFTMENU PRERENDERER CLASS
+##################################################################################
+# Class that uses idle time in the main loop to compose the displays one tap away
+# from the current display (the targets of its DisplayAction.Display buttons) to
+# their off-screen backbuffers, so showing one of them is a single blit.  Each call
+# to run spends at most budget seconds and at most max_displays pre-rendered
+# backbuffers are kept, the oldest being dropped first.  The hits counter is the
+# number of pre-rendered displays shown without being composed again and misses
+# is the number of displays that had to be composed when shown.
+##################################################################################
+class Prerenderer:
+    enabled      = False
+    budget       = 0.05
+    max_displays = 4
+    current      = None
+    pending      = []
+    displays     = OrderedDict()
+    hits         = 0
+    misses       = 0
+    prerendered  = 0
+    evicted      = 0
+
+    ##################################################################################
+    # PRERENDERER GET_TARGETS METHOD
+    ##################################################################################
+    # Returns the list of core displays that the buttons of the display passed in
+    # can show directly.
+    ##################################################################################
+    @staticmethod
+    def get_targets(display):
+        targets = []
+        for button in display.buttons:
+            if button is None:
+                continue
+            for action in [button.action, button.action_right]:
+                if action is None or action.action != DisplayAction.Display or action.data not in Displays.menus:
+                    continue
+                target = Displays.menus[action.data]
+                if target.is_core and target is not display and target not in targets:
+                    targets.append(target)
+        return targets
+
+    ##################################################################################
+    # PRERENDERER RUN METHOD
+    ##################################################################################
+    # Composes the backbuffers of the targets of the current display until all are
+    # done or the time budget is used.  The targets are found once each time the
+    # current display changes.  Returns the number of displays composed.
+    ##################################################################################
+    @classmethod
+    def run(cls):
+        if not cls.enabled or Displays.current is None:
+            return 0
+        if Displays.current is not cls.current:
+            cls.current = Displays.current
+            cls.pending = cls.get_targets(cls.current)
+        start_time = time.time()
+        composed = 0
+        while cls.pending and time.time() - start_time < cls.budget:
+            target = cls.pending.pop(0)
+            if target.is_composed():
+                continue
+            target.build_backbuffer()
+            cls.displays[target] = True
+            cls.prerendered += 1
+            composed += 1
+            while len(cls.displays) > cls.max_displays > 0:
+                evicted_display = cls.displays.popitem(last=False)[0]
+                evicted_display.invalidate()
+                cls.evicted += 1
+        if composed:
+            logger.debug("Pre-rendered {0} display(s) in {1:.3f} seconds".format(composed, time.time() - start_time))
+        return composed
+
+    ##################################################################################
+    # PRERENDERER HAS_WORK METHOD
+    ##################################################################################
+    # Returns True if there are displays left to compose for the current display.
+    ##################################################################################
+    @classmethod
+    def has_work(cls):
+        if not cls.enabled or Displays.current is None:
+            return False
+        return Displays.current is not cls.current or bool(cls.pending)
+
+    ##################################################################################
+    # PRERENDERER SHOWN METHOD
+    ##################################################################################
+    # Called when a display is composed to the screen to keep the hit and miss
+    # counts.  A shown display is no longer counted against max_displays.
+    ##################################################################################
+    @classmethod
+    def shown(cls, display, reused):
+        if display in cls.displays:
+            del cls.displays[display]
+            if reused:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+        elif cls.enabled and not reused:
+            cls.misses += 1
+
+    ##################################################################################
+    # PRERENDERER CLEAR METHOD
+    ##################################################################################
+    # Drops all pre-rendered backbuffers and resets the counters.
+    ##################################################################################
+    @classmethod
+    def clear(cls):
+        for display in cls.displays:
+            display.invalidate()
+        cls.displays.clear()
+        cls.current = None
+        cls.pending = []
+        cls.hits = 0
+        cls.misses = 0
+        cls.prerendered = 0
+        cls.evicted = 0
+
+
 ##################################################################################
 # BASELINE LINE CLASS
 ##################################################################################
@@ -577,16 +916,26 @@ class BaseLine(object):
     font_v_align = None
     font_v_padding = None
     font_pad = None
+    render_key = None
+    render_result = None
+    glyph_atlas = False
+    auto_fit = False
+    min_font_size = None
+    fit_box = None
+    fit_sizes = {}
+    fit_sizes_max = 256
 
     ##################################################################################
     # BASELINE INIT METHOD
     ##################################################################################
     # Initialize method of the BaseLine class.  Unlike the other line classes, this
-    # one does not set any defaults.
+    # one does not set any defaults.  If auto_fit is set, font_size is the largest
+    # size used and the text is shrunk (down to min_font_size) to fit the fit_box
+    # (see get_font_size).
     ##################################################################################
     def __init__(self, text=None, font_size=None, font_color=None, font=None, font_style=None,
                  font_h_align=None, font_h_padding=None, font_v_align=None, font_v_padding=None, font_pad=False,
-                 wrap_text=False):
+                 wrap_text=False, auto_fit=False, min_font_size=None):
         self.text = text
         self.font_size = font_size
         self.font_color = font_color
@@ -598,44 +947,193 @@ class BaseLine(object):
         self.font_v_padding = font_v_padding
         self.font_pad = font_pad
         self.wrap_text = wrap_text
+        self.auto_fit = auto_fit
+        self.min_font_size = min_font_size
 
     ##################################################################################
-    # BASELINE RENDER METHOD
+    # BASELINE INVALIDATE METHOD
     ##################################################################################
-    # Method to render the text of a BaseLine or derived object.
+    # Clears the last rendered surface so the next render re-rasterizes the text.
+    # Not normally needed as any change to an attribute that affects the output is
+    # detected by render.
     ##################################################################################
-    def render(self, background_color=None):
-        if self.font is None:
-            self.font = pygame.freetype.Font(None, self.font_size, resolution=Defaults.default_font_resolution)
-        elif isinstance(self.font, pygame.freetype.Font):
-            self.font = pygame.freetype.Font(self.font.path, self.font_size,
-                                             resolution=Defaults.default_font_resolution)
+    def invalidate(self):
+        self.render_key = None
+        self.render_result = None
+        SurfaceCache.release(SurfaceCacheName.Lines, self)
+
+    ##################################################################################
+    # BASELINE CONVERT_SURFACE METHOD
+    ##################################################################################
+    # Converts the last rendered surface (if any) to the screen pixel format.  Used
+    # for lines rendered before the display mode was set.
+    ##################################################################################
+    def convert_surface(self):
+        if self.render_result is not None:
+            self.render_result = (Surfaces.convert(self.render_result[0]), self.render_result[1])
+            SurfaceCache.track(SurfaceCacheName.Lines, self, [self.render_result[0]], BaseLine.invalidate)
+
+    ##################################################################################
+    # BASELINE GET_WRAP_WIDTH METHOD
+    ##################################################################################
+    # Returns the width that wrapped text is fit into, which is the width of the area
+    # less the padding.  The area is the screen less the border of the current
+    # display (if any) unless an area_width is passed in.
+    ##################################################################################
+    def get_wrap_width(self, area_width=None):
+        if area_width is not None:
+            return area_width - (self.font_h_padding * 2)
+        if not hasattr(Displays.current, "border_width"):
+            return Defaults.tft_width - (self.font_h_padding * 2)
+        return Defaults.tft_width - ((Displays.current.border_width + self.font_h_padding) * 2)
+
+    ##################################################################################
+    # BASELINE GET_RENDER_KEY METHOD
+    ##################################################################################
+    # Returns a tuple of every attribute that affects the rendered output of the
+    # line.  When the key matches the key of the last render, the last rendered
+    # surface can be reused as is.  The text is always the first item.
+    ##################################################################################
+    def get_render_key(self, background_color=None, area_width=None):
+        font = self.font.path if isinstance(self.font, pygame.freetype.Font) else self.font
+        font_color = tuple(self.font_color) if self.font_color is not None else None
+        if self.wrap_text:
+            wrap = (self.get_wrap_width(area_width), self.font_h_align, self.font_v_padding,
+                    tuple(background_color) if background_color is not None else None)
         else:
-            self.font = pygame.freetype.Font(self.font, self.font_size, resolution=Defaults.default_font_resolution)
-        self.font.style = self.font_style
-        self.font.pad = self.font_pad
+            wrap = None
+        return (self.text, font, self.get_font_size(), font_color, self.font_style, self.font_pad,
+                Defaults.default_font_resolution, self.wrap_text, wrap)
+
+    ##################################################################################
+    # BASELINE GET_FONT_SIZE METHOD
+    ##################################################################################
+    # Returns the font size the line is rendered with.  This is font_size unless
+    # auto_fit is set and the line has a fit_box (a width and height, set by the
+    # button the line is on, by the TextLayout of the dialog, splash, header or
+    # footer the line is in or by the code drawing it), in which case it is the
+    # largest size from min_font_size to font_size that the text fits in.  The size
+    # is found with a binary search over the FontMetrics tables of the sizes, so no
+    # text is rendered, and is kept for each text, box and font.
+    ##################################################################################
+    def get_font_size(self):
+        if not self.auto_fit or self.fit_box is None or self.wrap_text or not self.text or self.font_size is None:
+            return self.font_size
+        font = self.font.path if isinstance(self.font, pygame.freetype.Font) else self.font
+        min_font_size = self.min_font_size if self.min_font_size is not None else Defaults.DEFAULT_MIN_FONT_SIZE
+        fit_key = (self.text, tuple(self.fit_box), font, self.font_size, min_font_size, self.font_style,
+                   self.font_pad, Defaults.default_font_resolution)
+        font_size = BaseLine.fit_sizes.get(fit_key)
+        if font_size is None:
+            font_size = self.fit_font_size(min_font_size)
+            if len(BaseLine.fit_sizes) >= BaseLine.fit_sizes_max:
+                BaseLine.fit_sizes.clear()
+            BaseLine.fit_sizes[fit_key] = font_size
+        return font_size
+
+    ##################################################################################
+    # BASELINE FITS METHOD
+    ##################################################################################
+    # Returns True if the text of the line at the font size passed in fits in the
+    # fit_box.
+    ##################################################################################
+    def fits(self, font_size):
+        font = FontCache.get_font(self.font, font_size, self.font_style)
+        font.pad = self.font_pad
+        metrics = FontMetrics.get_metrics(font)
+        text_rect = metrics.get_rect(self.text) if metrics is not None else font.get_rect(self.text)
+        return text_rect.width <= self.fit_box[0] and text_rect.height <= self.fit_box[1]
+
+    ##################################################################################
+    # BASELINE FIT_FONT_SIZE METHOD
+    ##################################################################################
+    # Returns the largest font size from the minimum size passed in to font_size that
+    # the text fits in the fit_box, or the minimum if it does not fit at any size.
+    # The minimum is never more than font_size, so text is never drawn larger than
+    # its font_size.
+    ##################################################################################
+    def fit_font_size(self, min_font_size):
+        min_font_size = min(min_font_size, self.font_size)
+        with FontCache.lock:
+            if self.fits(self.font_size):
+                return self.font_size
+            low = min_font_size
+            high = self.font_size - 1
+            fit_size = min_font_size
+            while low <= high:
+                middle = (low + high) / 2
+                if self.fits(middle):
+                    fit_size = middle
+                    low = middle + 1
+                else:
+                    high = middle - 1
+        logger.debug("Text fit to {0}x{1} at font size {2} of {3}.  Text: {4}".format(
+            self.fit_box[0], self.fit_box[1], fit_size, self.font_size, self.text))
+        return fit_size
+
+    ##################################################################################
+    # BASELINE RENDER METHOD
+    ##################################################################################
+    # Method to render the text of a BaseLine or derived object.  The font is taken
+    # from the FontCache so the font file is not re-opened on every render, and the
+    # last rendered surface and rect are kept (within the SurfaceCache budget) and
+    # returned as long as nothing that affects the output has changed since.  The
+    # area_width is the width wrapped text is fit into (see get_wrap_width).
+    ##################################################################################
+    def render(self, background_color=None, area_width=None):
+        render_key = self.get_render_key(background_color, area_width)
+        if self.render_result is not None and render_key == self.render_key:
+            SurfaceCache.touch(SurfaceCacheName.Lines, self)
+            return self.render_result
+        with FontCache.lock:
+            self.render_result = self.render_text(background_color, area_width)
+        self.render_key = render_key
+        SurfaceCache.track(SurfaceCacheName.Lines, self, [self.render_result[0]], BaseLine.invalidate)
+        return self.render_result
+
+    ##################################################################################
+    # BASELINE RENDER_TEXT METHOD
+    ##################################################################################
+    # Method that rasterizes the text of the line, wrapping it if wrap_text is set.
+    # If glyph_atlas is set, text made up of the characters of the GlyphAtlas is
+    # copied from the atlas instead, and only the characters that changed since the
+    # last render are copied again when the rest of the line is the same.
+    ##################################################################################
+    def render_text(self, background_color=None, area_width=None):
+        font = FontCache.get_font(self.font, self.get_font_size(), self.font_style)
+        font.pad = self.font_pad
+        if not self.wrap_text and self.glyph_atlas:
+            atlas = GlyphAtlas.get_atlas(font, self.font_color)
+            if atlas is not None:
+                last_surface = last_text = None
+                if self.render_result is not None and \
+                        self.render_key[1:] == self.get_render_key(background_color, area_width)[1:]:
+                    last_surface, last_text = self.render_result[0], self.render_key[0]
+                rendered = atlas.render(self.text if self.text is not None else "", last_surface, last_text)
+                if rendered is not None:
+                    return rendered
         if not self.wrap_text:
-            return self.font.render(self.text if self.text is not None else "", fgcolor=self.font_color)
+            text_surface, text_font_rect = font.render(self.text if self.text is not None else "",
+                                                       fgcolor=self.font_color)
+            return Surfaces.convert(text_surface), text_font_rect
         else:
             wrapped_text = ""
             try:
-                wrapped_text = wrap_text_line(self.font, self.text if self.text is not None else "",
-                                              Defaults.tft_width - (self.font_h_padding * 2)
-                                              if not hasattr(Displays.current, "border_width")
-                                              else Defaults.tft_width - ((Displays.current.border_width +
-                                                                          self.font_h_padding) * 2))
+                wrapped_text = wrap_text_line(font, self.text if self.text is not None else "",
+                                              self.get_wrap_width(area_width))
             except Exception, ex:
                 logger.error("Error occurred while attempting to wrap text.  {0}".format(ex))
                 Displays.shutdown(Shutdown.Error, SplashBuiltIn.Error)
             if len(wrapped_text[0]) is 1:
-                return self.font.render(wrapped_text[0][0] if wrapped_text[0][0] is not None else "",
-                                        fgcolor=self.font_color)
+                text_surface, text_font_rect = font.render(wrapped_text[0][0] if wrapped_text[0][0] is not None
+                                                           else "", fgcolor=self.font_color)
+                return Surfaces.convert(text_surface), text_font_rect
             else:
                 surface_width = max(wrapped_text[2])
                 surface_height = sum(wrapped_text[1]) + (self.font_v_padding * (len(wrapped_text[0]) - 1))
-                text_surface = pygame.Surface((surface_width, surface_height))
+                text_surface = Surfaces.create((surface_width, surface_height))
                 if background_color is not None:
-                    text_surface.fill(background_color)
+                    text_surface.fill(Surfaces.map_color(background_color))
                 text_top = 0
                 for index in range(0, len(wrapped_text[0])):
                     top = text_top
@@ -646,7 +1144,7 @@ class BaseLine(object):
                     else:
                         left = (surface_width / 2) - (int(wrapped_text[2][index]) / 2)
                     try:
-                        self.font.render_to(text_surface, (left, top), wrapped_text[0][index], fgcolor=self.font_color)
+                        font.render_to(text_surface, (left, top), wrapped_text[0][index], fgcolor=self.font_color)
                     except Exception, ex:
                         logger.error("Error occurred while attempting to render wrapped text.  {0}".format(ex))
                     text_top += wrapped_text[1][index] + self.font_v_padding
@@ -667,11 +1165,11 @@ class TextLine(BaseLine):
     ##################################################################################
     def __init__(self, text=None, font_size=None, font_color=None, font=None, font_style=None,
                  font_h_align=None, font_h_padding=None, font_v_align=None, font_v_padding=None, font_pad=True,
-                 wrap_text=False):
+                 wrap_text=False, auto_fit=False, min_font_size=None):
         super(TextLine, self).__init__(text=text, font_size=font_size, font_color=font_color, font=font,
                                        font_style=font_style, font_h_align=font_h_align, font_h_padding=font_h_padding,
                                        font_v_align=font_v_align, font_v_padding=font_v_padding, font_pad=font_pad,
-                                       wrap_text=wrap_text)
+                                       wrap_text=wrap_text, auto_fit=auto_fit, min_font_size=min_font_size)
         if self.font is None:
             self.font = Defaults.default_text_line_font
         if self.font_color is None:
@@ -704,11 +1202,12 @@ class SplashLine(BaseLine):
     ##################################################################################
     def __init__(self, text=None, font_size=None, font_color=None, font=None, font_style=None,
                  font_h_align=None, font_h_padding=None, font_v_align=None, font_v_padding=None, font_pad=True,
-                 wrap_text=False):
+                 wrap_text=False, auto_fit=False, min_font_size=None):
         super(SplashLine, self).__init__(text=text, font_size=font_size, font_color=font_color, font=font,
                                          font_style=font_style, font_h_align=font_h_align,
                                          font_h_padding=font_h_padding, font_v_align=font_v_align,
-                                         font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text)
+                                         font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text,
+                                         auto_fit=auto_fit, min_font_size=min_font_size)
         if self.font is None:
             self.font = Defaults.default_splash_font
         if self.font_color is None:
@@ -741,11 +1240,12 @@ class DialogLine(BaseLine):
     ##################################################################################
     def __init__(self, text=None, font_size=None, font_color=None, font=None, font_style=None,
                  font_h_align=None, font_h_padding=None, font_v_align=None, font_v_padding=None, font_pad=True,
-                 wrap_text=False):
+                 wrap_text=False, auto_fit=False, min_font_size=None):
         super(DialogLine, self).__init__(text=text, font_size=font_size, font_color=font_color, font=font,
                                          font_style=font_style, font_h_align=font_h_align,
                                          font_h_padding=font_h_padding, font_v_align=font_v_align,
-                                         font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text)
+                                         font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text,
+                                         auto_fit=auto_fit, min_font_size=min_font_size)
         if self.font is None:
             self.font = Defaults.default_dialog_font
         if self.font_color is None:
@@ -779,11 +1279,12 @@ class HeadFootLine(BaseLine):
     ##################################################################################
     def __init__(self, text=None, font_size=None, font_color=None, font=None, font_style=None,
                  font_h_align=None, font_h_padding=None, font_v_align=None, font_v_padding=None, font_pad=True,
-                 wrap_text=False):
+                 wrap_text=False, auto_fit=False, min_font_size=None):
         super(HeadFootLine, self).__init__(text=text, font_size=font_size, font_color=font_color, font=font,
                                            font_style=font_style, font_h_align=font_h_align,
                                            font_h_padding=font_h_padding, font_v_align=font_v_align,
-                                           font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text)
+                                           font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text,
+                                           auto_fit=auto_fit, min_font_size=min_font_size)
         if self.font is None:
             self.font = Defaults.default_headfoot_font
         if self.font_color is None:
@@ -816,11 +1317,12 @@ class ButtonLine(BaseLine):
     ##################################################################################
     def __init__(self, text=None, font_size=None, font_color=None, font=None, font_style=None,
                  font_h_align=None, font_h_padding=None, font_v_align=None, font_v_padding=None, font_pad=True,
-                 wrap_text=False):
+                 wrap_text=False, auto_fit=False, min_font_size=None):
         super(ButtonLine, self).__init__(text=text, font_size=font_size, font_color=font_color, font=font,
                                          font_style=font_style, font_h_align=font_h_align,
                                          font_h_padding=font_h_padding, font_v_align=font_v_align,
-                                         font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text)
+                                         font_v_padding=font_v_padding, font_pad=font_pad, wrap_text=wrap_text,
+                                         auto_fit=auto_fit, min_font_size=min_font_size)
         if self.font is None:
             self.font = Defaults.default_button_font
         if self.font_color is None:
@@ -839,6 +1341,98 @@ class ButtonLine(BaseLine):
             self.font_v_padding = Defaults.default_button_font_v_padding
 
 
+##################################################################################
+# TFTMENU TEXT LAYOUT CLASS
+##################################################################################
+# Class that positions a block of lines inside a box using the horizontal
+# alignment of each line and a vertical alignment for the whole block.  It is
+# shared by the Splash, Dialog and Header classes.  The positions of the lines
+# are kept along with a key of the inputs, so laying out the same lines in the
+# same box again returns the last result without measuring anything.  When only
+# some lines change, only those lines are rendered again as each line keeps its
+# own last rendered surface.  The surfaces themselves are only held by the lines,
+# so a line surface released by the SurfaceCache is really freed (and rendered
+# again the next time it is laid out).
+##################################################################################
+class TextLayout(object):
+    layout_key = None
+    rects = None
+    hits = 0
+    misses = 0
+
+    ##################################################################################
+    # TEXT LAYOUT GET_LAYOUT_KEY METHOD
+    ##################################################################################
+    # Returns a tuple of all of the inputs that affect the positions of the lines.
+    ##################################################################################
+    @staticmethod
+    def get_layout_key(lines, box, v_align, background_color, area_width, bottom):
+        line_keys = []
+        for line in lines:
+            line_keys.append((line.get_render_key(background_color, area_width), line.font_h_align,
+                              line.font_h_padding, line.font_v_padding))
+        return tuple(line_keys), tuple(box), v_align, bottom
+
+    ##################################################################################
+    # TEXT LAYOUT LAYOUT METHOD
+    ##################################################################################
+    # Renders and positions the lines inside the box and returns a list of surface
+    # and rect tuples ready to be blitted.  Bottom aligned text ends at the bottom
+    # y coordinate, which defaults to the bottom of the box.  The background color
+    # and area width are passed to the line render for wrapped text.  Lines with
+    # auto_fit set are fit into the box less their padding.
+    ##################################################################################
+    def layout(self, lines, box, v_align, background_color=None, area_width=None, bottom=None):
+        if bottom is None:
+            bottom = box.bottom
+        for line in lines:
+            if line.auto_fit:
+                line.fit_box = (box.width - ((line.font_h_padding or 0) * 2),
+                                box.height - ((line.font_v_padding or 0) * 2))
+        layout_key = self.get_layout_key(lines, box, v_align, background_color, area_width, bottom)
+        if self.rects is not None and layout_key == self.layout_key:
+            self.hits += 1
+            positioned = []
+            for line, line_key, text_rect in zip(lines, layout_key[0], self.rects):
+                if line.render_result is None or line.render_key != line_key[0]:
+                    line.render(background_color, area_width)
+                else:
+                    SurfaceCache.touch(SurfaceCacheName.Lines, line)
+                positioned.append((line.render_result[0], text_rect))
+            return positioned
+        self.misses += 1
+        rendered = []
+        block_height = 0
+        for line in lines:
+            text_surface, text_font_rect = line.render(background_color, area_width)
+            rendered.append((line, text_surface, text_font_rect.width, text_font_rect.height))
+            block_height += text_font_rect.height + line.font_v_padding
+        if v_align is not TextVAlign.Top and lines:
+            block_height -= lines[-1].font_v_padding
+        positioned = []
+        block_offset = 0
+        for line, text_surface, text_width, text_height in rendered:
+            # Handle horizontal alignment
+            if line.font_h_align == TextHAlign.Left:
+                text_left = box.x + line.font_h_padding
+            elif line.font_h_align == TextHAlign.Right:
+                text_left = box.right - text_width - line.font_h_padding
+            else:
+                text_left = box.x + (box.width - text_width) / 2
+            # Handle vertical alignment
+            if v_align == TextVAlign.Top:
+                text_top = box.y + line.font_v_padding + block_offset
+            elif v_align == TextVAlign.Bottom:
+                text_top = bottom - block_height - line.font_v_padding + block_offset
+            else:
+                text_top = box.y + ((box.height - block_height) / 2) + block_offset
+            positioned.append((text_surface, text_surface.get_rect(left=text_left, top=text_top)))
+            block_offset += text_height + line.font_v_padding
+        self.rects = [text_rect for text_surface, text_rect in positioned]
+        self.layout_key = layout_key
+        return positioned
+
+
 ##################################################################################
 # TFTMENU ACTION CLASS
 ##################################################################################
@@ -860,6 +1454,101 @@ class Action(object):
         self.render_data = render_data
 
 
+##################################################################################
+# TFTMENU DRAW CALLBACK CLASS
+##################################################################################
+# A draw function of a display (see Display.add_draw_callback) along with when it
+# needs to be called.  The function is called with the screen and the display and
+# returns the rectangle (or list of rectangles) it drew to.  A function with an
+# interval (in seconds) is called that often, one that is on_dirty is called once
+# each time set_dirty is called, and one that has both is called for either.  A
+# function with neither is called on every pass of the main loop.  All of them
+# are called after the display is painted, as that covers what they drew.
+##################################################################################
+class DrawCallback(object):
+    function = None
+    interval = None
+    on_dirty = False
+    dirty = True
+    next_call = None
+    calls = 0
+
+    ##################################################################################
+    # DRAW CALLBACK INIT METHOD
+    ##################################################################################
+    # Sets the draw function and when it is to be called.
+    ##################################################################################
+    def __init__(self, function, interval=None, on_dirty=False):
+        self.function = function
+        self.interval = interval
+        self.on_dirty = on_dirty
+
+    ##################################################################################
+    # DRAW CALLBACK SET_DIRTY METHOD
+    ##################################################################################
+    # Marks the draw function to be called on the next pass of the main loop and
+    # wakes the loop.  Can be called from any thread (like one that fetches the data
+    # the function draws).
+    ##################################################################################
+    def set_dirty(self):
+        self.dirty = True
+        EventLoop.wake()
+
+    ##################################################################################
+    # DRAW CALLBACK IS_EVERY_PASS METHOD
+    ##################################################################################
+    # Returns True if the draw function is called on every pass of the main loop.
+    ##################################################################################
+    def is_every_pass(self):
+        return not self.interval and not self.on_dirty
+
+    ##################################################################################
+    # DRAW CALLBACK IS_DUE METHOD
+    ##################################################################################
+    # Returns True if the draw function needs to be called at the time passed in.
+    # Calls due within Times.WakeMargin are made early so that draw functions with
+    # the same interval are called (and their rectangles pushed) together.
+    ##################################################################################
+    def is_due(self, now):
+        if self.dirty or self.is_every_pass():
+            return True
+        return bool(self.interval) and (self.next_call is None or self.next_call - now <= Times.WakeMargin)
+
+    ##################################################################################
+    # DRAW CALLBACK GET_WAIT METHOD
+    ##################################################################################
+    # Returns the number of seconds from the time passed in until the draw function
+    # needs to be called, or None if it only waits for set_dirty.
+    ##################################################################################
+    def get_wait(self, now):
+        if self.dirty or self.is_every_pass():
+            return 0 if self.dirty else Times.SleepLoop
+        if not self.interval:
+            return None
+        if self.next_call is None:
+            return 0
+        return max(self.next_call - now, 0)
+
+    ##################################################################################
+    # DRAW CALLBACK CALL METHOD
+    ##################################################################################
+    # Calls the draw function and returns the rectangles it drew to.  The next call
+    # of a function with an interval is kept on its schedule, unless the call was
+    # made early (the function was dirty) or the loop fell behind, in which case
+    # the interval starts again from now.
+    ##################################################################################
+    def call(self, screen, display, now):
+        self.dirty = False
+        if self.interval:
+            if self.next_call is not None and self.next_call - now <= Times.WakeMargin < \
+                    self.next_call + self.interval - now:
+                self.next_call += self.interval
+            else:
+                self.next_call = now + self.interval
+        self.calls += 1
+        return self.function(screen, display)
+
+
 ##################################################################################
 # TFTMENU DISPLAY CLASS
 ##################################################################################
@@ -879,6 +1568,9 @@ class Display(object):
     last = None
     force_refresh = False
     is_core = False
+    backbuffer = None
+    backbuffer_key = None
+    fingerprint = None
 
     ##################################################################################
     # DISPLAY INIT METHOD
@@ -898,37 +1590,152 @@ class Display(object):
         self.timeout_function = merge(Displays.timeout_sleep, timeout_function)
         if self.border_width is None:
             self.border_width = Defaults.default_border_width
-        self.draw_callback = array_single_none(draw_callback)
+        self.draw_callback = []
+        for draw_function in array_single_none(draw_callback):
+            self.add_draw_callback(draw_function)
         self.is_core = True
 
+    ##################################################################################
+    # DISPLAY GET_HEADFOOTS METHOD
+    ##################################################################################
+    # Returns a list of the header and footer of the display that are set.
+    ##################################################################################
+    def get_headfoots(self):
+        headfoots = []
+        for attribute in [Attributes.Header, Attributes.Footer]:
+            headfoot = getattr(self, attribute, None)
+            if headfoot is not None:
+                headfoots.append(headfoot)
+        return headfoots
+
+    ##################################################################################
+    # DISPLAY GET_LINES METHOD
+    ##################################################################################
+    # Returns a list of the text lines of the display (header, footer and buttons).
+    ##################################################################################
+    def get_lines(self):
+        lines = [headfoot.text for headfoot in self.get_headfoots()]
+        for button in self.buttons:
+            if button is not None:
+                lines.append(button.text)
+        return lines
+
+    ##################################################################################
+    # DISPLAY GET_BACKBUFFER_KEY METHOD
+    ##################################################################################
+    # Returns a tuple describing the static content of the display: colors, border,
+    # the buttons and any header or footer that does not change on its own.  The
+    # composed backbuffer of the display is only reused while this key is unchanged.
+    ##################################################################################
+    def get_backbuffer_key(self):
+        button_keys = []
+        for button in self.buttons:
+            if button is not None:
+                button_keys.append((button.x, button.y, button.get_render_key()))
+        headfoot_keys = []
+        for headfoot in self.get_headfoots():
+            headfoot_keys.append(headfoot.get_render_key(self))
+        return (Defaults.tft_size, tuple(self.background_color) if self.background_color is not None else None,
+                tuple(self.border_color) if self.border_color is not None else None, self.border_width,
+                tuple(button_keys), tuple(headfoot_keys))
+
+    ##################################################################################
+    # DISPLAY INVALIDATE METHOD
+    ##################################################################################
+    # Drops the composed backbuffer so the next render repaints everything.
+    ##################################################################################
+    def invalidate(self):
+        self.backbuffer = None
+        self.backbuffer_key = None
+        SurfaceCache.release(SurfaceCacheName.Backbuffers, self)
+
+    ##################################################################################
+    # DISPLAY IS_COMPOSED METHOD
+    ##################################################################################
+    # Returns True if the backbuffer holds the current static content of the display.
+    ##################################################################################
+    def is_composed(self, backbuffer_key=None):
+        if backbuffer_key is None:
+            backbuffer_key = self.get_backbuffer_key()
+        return self.backbuffer is not None and backbuffer_key == self.backbuffer_key
+
+    ##################################################################################
+    # DISPLAY BUILD_BACKBUFFER METHOD
+    ##################################################################################
+    # Method that draws the static content of the display (background, border, static
+    # headers and footers and buttons) to a new off-screen backbuffer.  It does not
+    # touch the screen, so it can be used to prepare a display before it is shown.
+    ##################################################################################
+    def build_backbuffer(self, backbuffer_key=None):
+        if backbuffer_key is None:
+            backbuffer_key = self.get_backbuffer_key()
+        backbuffer = Surfaces.create(Defaults.tft_size)
+        # Fill with background color
+        backbuffer.fill(Surfaces.map_color(self.background_color))
+        # Draw Border
+        draw_true_rect(backbuffer, self.border_color, 0, 0, Defaults.tft_width - 1, Defaults.tft_height - 1,
+                       self.border_width)
+        # Draw static Header and Footer
+        for headfoot in self.get_headfoots():
+            if headfoot.is_static():
+                headfoot.render(self, surface=backbuffer)
+        # Draw Buttons
+        self.render_buttons(backbuffer)
+        self.backbuffer = backbuffer
+        self.backbuffer_key = backbuffer_key
+        SurfaceCache.track(SurfaceCacheName.Backbuffers, self, [backbuffer], Display.invalidate)
+
+    ##################################################################################
+    # DISPLAY COMPOSE METHOD
+    ##################################################################################
+    # Method that draws the display to the screen without updating the display.  The
+    # static content (background, border, static headers and footers and buttons) is
+    # composed once and kept in a backbuffer, so re-composing an unchanged display is
+    # a single blit with only the dynamic headers and footers (time, date, etc.)
+    # painted on top.  The backbuffer is rebuilt when refresh is True or the static
+    # content changes.
+    ##################################################################################
+    def compose(self, refresh=False):
+        backbuffer_key = self.get_backbuffer_key()
+        composed = self.is_composed(backbuffer_key)
+        Prerenderer.shown(self, composed and not refresh)
+        if refresh or not composed:
+            self.build_backbuffer(backbuffer_key)
+        else:
+            SurfaceCache.touch(SurfaceCacheName.Backbuffers, self)
+        Surfaces.blit(Displays.screen, self.backbuffer, (0, 0))
+        # Draw dynamic Header and Footer
+        for headfoot in self.get_headfoots():
+            if not headfoot.is_static():
+                headfoot.render(self)
+
     ##################################################################################
     # DISPLAY RENDER METHOD
     ##################################################################################
     # Method for rendering Display and Menu items.  Set the screen to the background
     # color, draws the border, renders any header of footer and finally renders the
-    # buttons and sets any screen timeout.
+    # buttons and sets any screen timeout.  See compose for how the static content
+    # is reused between renders.  When force_refresh is set on the display that is
+    # already on the screen, the repaint is skipped if the fingerprint of the display
+    # (its backbuffer key: colors, border, buttons and static header and footer) is
+    # the same as when it was last rendered.  Displays with draw callbacks are always
+    # repainted as the callbacks may rely on it.
     ##################################################################################
     def render(self, data=None):
         # No need to render unless current display
         if Displays.current == self and not self.force_refresh:
             return
+        force_refresh = self.force_refresh
         self.force_refresh = False
-        # Fill with background color
-        Displays.screen.fill(self.background_color)
-        # Draw Border
-        draw_true_rect(Displays.screen, self.border_color, 0, 0, Defaults.tft_width - 1, Defaults.tft_height - 1,
-                       self.border_width)
-        # Draw Header
-        if hasattr(self, 'header'):
-            if self.header is not None:
-                self.header.render(self)
-        if hasattr(self, 'footer'):
-            if self.footer is not None:
-                self.footer.render(self)
-        # Draw Buttons
-        self.render_buttons()
-        # Update Screen
-        pygame.display.flip()
+        if force_refresh and Displays.current == self and not self.draw_callback and \
+                self.fingerprint is not None and self.fingerprint == self.get_backbuffer_key():
+            logger.debug("Refresh skipped as the display is unchanged.  Display: {0}".format(self))
+        else:
+            self.compose(force_refresh)
+            self.fingerprint = self.backbuffer_key
+            # Update Screen
+            Compositor.add_full()
+            Compositor.present()
         # Set Timeout
         Timer.timeout(self.timeout)
         Backlight.screen_wake()
@@ -939,10 +1746,43 @@ class Display(object):
     # Method that loops through the buttons in class to be rendered and calls the
     # Button render function for each.
     ##################################################################################
-    def render_buttons(self):
+    def render_buttons(self, surface=None):
         for button in self.buttons:
             if button is not None:
-                button.render()
+                button.render(surface=surface)
+
+    ##################################################################################
+    # DISPLAY UPDATE_BUTTON METHOD
+    ##################################################################################
+    # Method that changes the attributes passed in (see Button.set_attributes) of a
+    # button on the display and, if the display is on the screen, repaints only that
+    # button.  The backbuffer is patched as well when it was up to date, so the next
+    # render of the display does not compose it again.  The button rectangle is
+    # added to the Compositor, so any number of updates during one pass of the main
+    # loop are pushed to the screen with a single update.  Returns the rectangle
+    # repainted or None if nothing was repainted.
+    ##################################################################################
+    def update_button(self, button, **attributes):
+        composed = self.is_composed()
+        shown = composed and self.fingerprint == self.backbuffer_key
+        button.set_attributes(**attributes)
+        if Displays.current is not self or \
+                (isinstance(self, Dialog) and self.dialog_type is DialogStyle.FullScreenOk):
+            return None
+        button_rect = Rect(button.x, button.y, button.width, button.height)
+        surfaces = [Displays.screen]
+        if composed:
+            surfaces.append(self.backbuffer)
+        for surface in surfaces:
+            if button.render(surface=surface) is None:
+                surface.fill(Surfaces.map_color(self.background_color), button_rect)
+        if composed:
+            self.backbuffer_key = self.get_backbuffer_key()
+            SurfaceCache.touch(SurfaceCacheName.Backbuffers, self)
+            if shown:
+                self.fingerprint = self.backbuffer_key
+        Compositor.add(button_rect)
+        return button_rect
 
     ##################################################################################
     # DISPLAYS PROCESS_LOCATION METHOD
@@ -975,9 +1815,8 @@ class Display(object):
         button = self.buttons[button_index - 1]
         if button is not None:
             if not (isinstance(Displays.current, Dialog) and Displays.current.dialog_type is DialogStyle.FullScreenOk):
-                button_rect = button.render(True)
-                if button_rect:
-                    pygame.display.update(button_rect)
+                Compositor.add(button.render(True))
+                Compositor.present()
             return button_index
         else:
             return 0
@@ -993,9 +1832,8 @@ class Display(object):
             return
         button = self.buttons[button_index - 1]
         if button is not None:
-            button_rect = button.render()
-            if button_rect:
-                pygame.display.update(button_rect)
+            Compositor.add(button.render())
+            Compositor.present()
 
     ##################################################################################
     # DISPLAYS PROCESS_BUTTON METHOD
@@ -1066,13 +1904,62 @@ class Display(object):
     # DISPLAYS DRAW METHOD
     ##################################################################################
     # Method that loops through a list of call back functions that can be used to
-    # manually draw text or images or graphics on a menu.
+    # manually draw text or images or graphics on a menu and calls those that are
+    # due (see DrawCallback).  A draw function can return the rectangle (or list of
+    # rectangles) it drew to, which are then pushed to the display by the
+    # Compositor with the rest of the frame.
     ##################################################################################
     def draw(self):
-        if self.draw_callback is not None:
-            for draw_function in self.draw_callback:
-                logger.debug("Calling draw function {0}".format(draw_function))
-                draw_function(Displays.screen, self)
+        now = monotonic()
+        for callback in self.draw_callback:
+            if callback.is_due(now):
+                logger.debug("Calling draw function {0}".format(callback.function))
+                Compositor.add(callback.call(Displays.screen, self, now))
+
+    ##################################################################################
+    # DISPLAY ADD_DRAW_CALLBACK METHOD
+    ##################################################################################
+    # Method that adds a draw function to the display and returns its DrawCallback.
+    # The interval (in seconds) and on_dirty set when the function is called (see
+    # DrawCallback).  A DrawCallback can be passed in instead of a function.
+    ##################################################################################
+    def add_draw_callback(self, draw_function, interval=None, on_dirty=False):
+        if isinstance(draw_function, DrawCallback):
+            callback = draw_function
+        else:
+            callback = DrawCallback(draw_function, interval, on_dirty)
+        self.draw_callback.append(callback)
+        return callback
+
+    ##################################################################################
+    # DISPLAY REMOVE_DRAW_CALLBACK METHOD
+    ##################################################################################
+    # Method that removes a draw function (or DrawCallback) from the display.
+    ##################################################################################
+    def remove_draw_callback(self, draw_function):
+        self.draw_callback = [callback for callback in self.draw_callback
+                              if callback is not draw_function and callback.function != draw_function]
+
+    ##################################################################################
+    # DISPLAY SET_DRAW_DIRTY METHOD
+    ##################################################################################
+    # Method that marks the draw function passed in (all of them if None) to be
+    # called on the next pass of the main loop.  Can be called from any thread.
+    ##################################################################################
+    def set_draw_dirty(self, draw_function=None):
+        for callback in self.draw_callback:
+            if draw_function is None or callback is draw_function or callback.function == draw_function:
+                callback.set_dirty()
+
+    ##################################################################################
+    # DISPLAY GET_DRAW_WAIT METHOD
+    ##################################################################################
+    # Method that returns the number of seconds from the time passed in until a
+    # draw function needs to be called, or None if none of them is scheduled.
+    ##################################################################################
+    def get_draw_wait(self, now):
+        waits = [wait for wait in [callback.get_wait(now) for callback in self.draw_callback] if wait is not None]
+        return min(waits) if waits else None
 
 
 ##################################################################################
@@ -1110,6 +1997,226 @@ class Menu(Display):
         self.is_core = True
 
 
+##################################################################################
+# TFTMENU TEXT VIEWER CLASS
+##################################################################################
+# Display class that shows a long text (a changelog, a log, command output) a page
+# at a time, along with buttons to move between the pages.  The text is passed in
+# as a string or list of lines, or as the path of a file, which is read from disk
+# as the pages are reached instead of being loaded whole (see TextPager).  Only
+# the lines of the page on the screen are wrapped and drawn, using the font and
+# colors of text_line (a TextLine, left aligned by default).  A header needs a
+# height to leave room for the text.  It is a core display.
+##################################################################################
+class TextViewer(Menu):
+    text_line = None
+    pager = None
+    page = 0
+
+    ##################################################################################
+    # TEXT VIEWER INIT METHOD
+    ##################################################################################
+    # Initialize the TextViewer class with defaults.  Without buttons, previous page,
+    # next page and back buttons are added along the bottom.
+    ##################################################################################
+    def __init__(self, text=None, path=None, encoding="utf-8", text_line=None, page=0,
+                 background_color=Defaults.default_background_color, border_color=Defaults.default_border_color,
+                 border_width=None, buttons=None, actions=None, timeout=Defaults.default_timeout,
+                 timeout_function=None, header=None, footer=None, draw_callback=None):
+        super(TextViewer, self).__init__(background_color=background_color, border_color=border_color,
+                                         border_width=border_width, buttons=buttons, actions=actions,
+                                         timeout=timeout, timeout_function=timeout_function, header=header,
+                                         footer=footer, draw_callback=draw_callback)
+        if buttons is None:
+            self.buttons = tfttemplates.get_buttons(ButtonTemplate.Bottom3x1,
+                                                    names=[ViewerButtonText.Previous, ViewerButtonText.Next,
+                                                           ViewerButtonText.Back],
+                                                    actions=[Action(DisplayAction.Function, TextViewer.previous_page),
+                                                             Action(DisplayAction.Function, TextViewer.next_page),
+                                                             Action(DisplayAction.Back)],
+                                                    background_color=background_color, border_color=border_color)
+        if text_line is None:
+            self.text_line = TextLine(None, font_h_align=TextHAlign.Left)
+        else:
+            self.text_line = text_line
+        if self.text_line.auto_fit:
+            logger.warning("Auto fit is not used for the pages of a TextViewer.  Font Size: {0}".format(
+                self.text_line.font_size))
+        self.pager = TextPager(text, path, encoding)
+        self.page = page
+
+    ##################################################################################
+    # TEXT VIEWER GET_LINES METHOD
+    ##################################################################################
+    # Returns a list of the text lines of the viewer, including the line that sets
+    # the font of the pages.
+    ##################################################################################
+    def get_lines(self):
+        return super(TextViewer, self).get_lines() + [self.text_line]
+
+    ##################################################################################
+    # TEXT VIEWER GET_TEXT_BOX METHOD
+    ##################################################################################
+    # Returns the rectangle the pages are drawn in, which is between the header (if
+    # it is shown) and the buttons, inside the border and the text line padding.
+    ##################################################################################
+    def get_text_box(self):
+        top = self.border_width
+        if self.header is not None and self.header.mode != HeadFootType.NoDisplay and self.header.height:
+            top += self.header.height
+        bottom = min(get_buttons_start_height(self.buttons), Defaults.tft_height - self.border_width)
+        return Rect(self.border_width + self.text_line.font_h_padding, top + self.text_line.font_v_padding,
+                    Defaults.tft_width - ((self.border_width + self.text_line.font_h_padding) * 2),
+                    bottom - top - (self.text_line.font_v_padding * 2))
+
+    ##################################################################################
+    # TEXT VIEWER GET_FONT METHOD
+    ##################################################################################
+    # Returns the font of the pages and sets the pager to the lines that fit the
+    # text box with it.
+    ##################################################################################
+    def get_font(self, text_box):
+        font = FontCache.get_font(self.text_line.font, self.text_line.font_size, self.text_line.font_style)
+        font.pad = self.text_line.font_pad
+        line_height = self.get_line_height(font)
+        self.pager.set_layout(font, text_box.width, (text_box.height + self.text_line.font_v_padding) /
+                              (line_height + self.text_line.font_v_padding))
+        return font
+
+    ##################################################################################
+    # TEXT VIEWER GET_LINE_HEIGHT METHOD
+    ##################################################################################
+    # Returns the height of each line of the pages, which is the same height used
+    # for wrapped text.
+    ##################################################################################
+    @staticmethod
+    def get_line_height(font):
+        metrics = FontMetrics.get_metrics(font)
+        if metrics is not None:
+            return metrics.get_line_height()
+        return font.get_rect("jet Mopping quiT!([}|/").height
+
+    ##################################################################################
+    # TEXT VIEWER DRAW_PAGE METHOD
+    ##################################################################################
+    # Draws the lines of the current page into the text box on the surface passed
+    # in, which must already hold the background of the box.  Returns the box.
+    ##################################################################################
+    def draw_page(self, surface):
+        text_box = self.get_text_box()
+        with FontCache.lock:
+            font = self.get_font(text_box)
+            self.page, page_lines = self.pager.get_page(self.page)
+            line_height = self.get_line_height(font)
+            metrics = FontMetrics.get_metrics(font)
+            text_top = text_box.y
+            for page_line in page_lines:
+                if self.text_line.font_h_align == TextHAlign.Left:
+                    text_left = text_box.x
+                else:
+                    text_width = metrics.get_width(page_line) if metrics is not None else \
+                        font.get_rect(page_line).width
+                    if self.text_line.font_h_align == TextHAlign.Right:
+                        text_left = text_box.right - text_width
+                    else:
+                        text_left = text_box.x + (text_box.width - text_width) / 2
+                if page_line:
+                    font.render_to(surface, (text_left, text_top), page_line, fgcolor=self.text_line.font_color)
+                text_top += line_height + self.text_line.font_v_padding
+        return text_box
+
+    ##################################################################################
+    # TEXT VIEWER COMPOSE METHOD
+    ##################################################################################
+    # Composes the display (see Display.compose) and then draws the current page
+    # over it.
+    ##################################################################################
+    def compose(self, refresh=False):
+        super(TextViewer, self).compose(refresh)
+        self.draw_page(Displays.screen)
+
+    ##################################################################################
+    # TEXT VIEWER SHOW_PAGE METHOD
+    ##################################################################################
+    # Moves to the page passed in (the last page if there are not that many).  If
+    # the page changed and the viewer is on the screen, only the text box is
+    # repainted, from the display backbuffer and the lines of the new page.  The
+    # whole display is composed again if the backbuffer is not up to date (it may
+    # have been released by the SurfaceCache).  Returns the page shown.
+    ##################################################################################
+    def show_page(self, page):
+        with FontCache.lock:
+            self.get_font(self.get_text_box())
+            page = self.pager.index_to(page)
+        if page == self.page:
+            return page
+        self.page = page
+        if Displays.current is self:
+            if self.is_composed():
+                text_box = self.get_text_box()
+                Surfaces.blit(Displays.screen, self.backbuffer, text_box, text_box)
+                Compositor.add(self.draw_page(Displays.screen))
+            else:
+                self.compose()
+                self.fingerprint = self.backbuffer_key
+                Compositor.add_full()
+            Compositor.present()
+        return self.page
+
+    ##################################################################################
+    # TEXT VIEWER RENDER METHOD
+    ##################################################################################
+    # Renders the viewer (see Display.render).  The page is not part of the display
+    # fingerprint, so a forced refresh always repaints instead of being skipped.
+    ##################################################################################
+    def render(self, data=None):
+        if self.force_refresh:
+            self.fingerprint = None
+        super(TextViewer, self).render(data)
+
+    ##################################################################################
+    # TEXT VIEWER NEXT_PAGE METHOD
+    ##################################################################################
+    # Shows the next page.  The button is passed in when used as a button action.
+    ##################################################################################
+    def next_page(self, button=None):
+        self.show_page(self.page + 1)
+
+    ##################################################################################
+    # TEXT VIEWER PREVIOUS_PAGE METHOD
+    ##################################################################################
+    # Shows the previous page.  The button is passed in when used as a button action.
+    ##################################################################################
+    def previous_page(self, button=None):
+        self.show_page(self.page - 1)
+
+    ##################################################################################
+    # TEXT VIEWER FIRST_PAGE METHOD
+    ##################################################################################
+    # Shows the first page.
+    ##################################################################################
+    def first_page(self, button=None):
+        self.show_page(0)
+
+    ##################################################################################
+    # TEXT VIEWER LAST_PAGE METHOD
+    ##################################################################################
+    # Shows the last page, which reads the text to the end the first time.
+    ##################################################################################
+    def last_page(self, button=None):
+        self.show_page(self.get_page_count() - 1)
+
+    ##################################################################################
+    # TEXT VIEWER GET_PAGE_COUNT METHOD
+    ##################################################################################
+    # Returns the number of pages, which reads the text to the end the first time.
+    ##################################################################################
+    def get_page_count(self):
+        with FontCache.lock:
+            self.get_font(self.get_text_box())
+            return self.pager.get_page_count()
+
+
 ##################################################################################
 # TFTMENU SPLASH CLASS
 ##################################################################################
@@ -1133,68 +2240,144 @@ class Splash(Display):
                                      draw_callback=draw_callback)
         self.text = array_single_none(text)
         self.timeout_function = merge([Displays.timeout_close], timeout_function)
+        self.layout = TextLayout()
+        self.splash_lines = {}
+        self.surface = None
+        self.surface_key = None
         self.is_core = False
 
+    ##################################################################################
+    # SPLASH GET_TEXT_LINES METHOD
+    ##################################################################################
+    # Returns the list of lines to show for the text passed in.  Items that are not
+    # lines are changed to SplashLines.  The SplashLines made for the splash's own
+    # text are kept in splash_lines (the text itself is left as is), so they keep
+    # their rendered surfaces.  Any line that renders the same as one of the
+    # splash's own lines is swapped for that line, so a title passed in with the
+    # splash data uses the surface already rendered for the title.
+    ##################################################################################
+    def get_text_lines(self, text):
+        text_lines = []
+        own_lines = {}
+        if text is not self.text:
+            for own_line in self.get_text_lines(self.text):
+                own_lines.setdefault(own_line.get_render_key(self.background_color, Defaults.tft_width), own_line)
+        for index, text_item in enumerate(text):
+            if not isinstance(text_item, BaseLine):
+                if text is self.text:
+                    splash_line = self.splash_lines.get(index)
+                    if splash_line is None or splash_line[0] != text_item:
+                        splash_line = (text_item, SplashLine(text_item))
+                        self.splash_lines[index] = splash_line
+                    text_item = splash_line[1]
+                else:
+                    text_item = SplashLine(text_item)
+            if text_item.text is None:
+                text_item.text = ""
+            if own_lines:
+                text_item = own_lines.get(text_item.get_render_key(self.background_color, Defaults.tft_width),
+                                          text_item)
+            text_lines.append(text_item)
+        return text_lines
+
+    ##################################################################################
+    # SPLASH GET_SURFACE_KEY METHOD
+    ##################################################################################
+    # Returns a tuple of everything that affects the pre-rendered splash surface.
+    ##################################################################################
+    def get_surface_key(self, text_lines):
+        line_keys = tuple([line.get_render_key(self.background_color, Defaults.tft_width) for line in text_lines])
+        return line_keys, tuple(self.background_color), Defaults.tft_size
+
+    ##################################################################################
+    # SPLASH DRAW_TEXT METHOD
+    ##################################################################################
+    # Draws the lines onto the surface passed in (the screen or a full screen
+    # surface).  Wrapped lines are fit into the full width of the screen.
+    ##################################################################################
+    def draw_text(self, surface, text_lines):
+        if text_lines:
+            splash_box = Rect(0, 0, Defaults.tft_width, Defaults.tft_height)
+            for text_surface, text_rect in self.layout.layout(text_lines, splash_box, text_lines[0].font_v_align,
+                                                              self.background_color, Defaults.tft_width,
+                                                              bottom=Defaults.tft_height - 1):
+                Surfaces.blit(surface, text_surface, text_rect)
+
+    ##################################################################################
+    # SPLASH PRERENDER METHOD
+    ##################################################################################
+    # Renders the splash (with its own text) to a full screen surface that is kept
+    # and blitted each time the splash is shown without data.
+    ##################################################################################
+    def prerender(self):
+        text_lines = self.get_text_lines(self.text)
+        surface = Surfaces.create(Defaults.tft_size)
+        surface.fill(Surfaces.map_color(self.background_color))
+        self.draw_text(surface, text_lines)
+        self.surface = surface
+        self.surface_key = self.get_surface_key(text_lines)
+        SurfaceCache.track(SurfaceCacheName.Splashes, self, [surface], Splash.invalidate)
+
+    ##################################################################################
+    # SPLASH INVALIDATE METHOD
+    ##################################################################################
+    # Drops the pre-rendered surface so it is rendered again the next time it is
+    # shown.
+    ##################################################################################
+    def invalidate(self):
+        self.surface = None
+        self.surface_key = None
+        SurfaceCache.release(SurfaceCacheName.Splashes, self)
+        super(Splash, self).invalidate()
+
+    ##################################################################################
+    # SPLASH GET_LINES METHOD
+    ##################################################################################
+    # Returns a list of the text lines of the splash.
+    ##################################################################################
+    def get_lines(self):
+        return super(Splash, self).get_lines() + self.get_text_lines(self.text)
+
+    ##################################################################################
+    # SPLASH CONVERT_SURFACES METHOD
+    ##################################################################################
+    # Converts the pre-rendered surface and the surfaces of the splash's own lines
+    # to the screen pixel format.  Used when the splash was pre-rendered before the
+    # display mode was set.
+    ##################################################################################
+    def convert_surfaces(self):
+        if self.surface is not None:
+            self.surface = Surfaces.convert(self.surface)
+            SurfaceCache.track(SurfaceCacheName.Splashes, self, [self.surface], Splash.invalidate)
+        for text_item in self.get_text_lines(self.text):
+            text_item.convert_surface()
+
     ##################################################################################
     # SPLASH RENDER METHOD
     ##################################################################################
     # Render the Splash display by showing the Splash Lines text and then setting the
-    # timeout.
+    # timeout.  Without data and with splash_prerender set (see Displays.initialize),
+    # the pre-rendered surface is blitted (and rendered again first if the text has
+    # changed).  Otherwise the lines are drawn directly to the screen.
     ##################################################################################
     def render(self, data=None):
         # No need to render unless current display
         if Displays.current == self:
             return
-        # Paint screen with background color.
-        Displays.screen.fill(self.background_color)
-        if data is not None:
-            render_text = array_single_none(data)
+        if data is not None or not Displays.splash_prerender:
+            # Paint screen with background color.
+            Displays.screen.fill(Surfaces.map_color(self.background_color))
+            self.draw_text(Displays.screen, self.get_text_lines(self.text if data is None else
+                                                                array_single_none(data)))
         else:
-            render_text = array_single_none(self.text)
-        if render_text:
-            splash_text_tuples = []
-            splash_text_height = 0
-            text_v_align = None
-            last_item = None
-            for text_item in render_text:
-                if not isinstance(text_item, BaseLine):
-                    text_item = SplashLine(text_item)
-                if text_item.text is None:
-                    text_item.text = ""
-                if text_v_align is None:
-                    text_v_align = text_item.font_v_align
-                text_surface, text_font_rect = text_item.render(self.background_color)
-                text_width = text_font_rect.width
-                text_height = text_font_rect.height
-                tuple_text = (text_surface, text_width, text_height, text_item.font_h_align, text_item.font_h_padding,
-                              text_item.font_v_padding)
-                last_text_height = text_height + text_item.font_v_padding
-                splash_text_height += last_text_height
-                splash_text_tuples.append(tuple_text)
-                last_item = text_item
-            splash_text_offset = 0
-            if text_v_align is not TextVAlign.Top:
-                splash_text_height -= last_item.font_v_padding
-            for text_line in splash_text_tuples:
-                # Handle horizontal alignment
-                if text_line[TextTuple.HAlign] == TextHAlign.Left:
-                    text_left = text_line[TextTuple.HPadding]
-                elif text_line[TextTuple.HAlign] == TextHAlign.Right:
-                    text_left = Defaults.tft_width - text_line[TextTuple.Width] - text_line[TextTuple.HPadding]
-                else:
-                    text_left = (Defaults.tft_width - text_line[TextTuple.Width]) / 2
-                # Handle vertical alignment
-                if text_v_align == TextVAlign.Top:
-                    text_top = text_line[TextTuple.VPadding] + splash_text_offset
-                elif text_v_align == TextVAlign.Bottom:
-                    text_top = (Defaults.tft_height - 1) - splash_text_height - text_line[TextTuple.VPadding] +\
-                               splash_text_offset
-                else:
-                    text_top = ((Defaults.tft_height - splash_text_height) / 2) + splash_text_offset
-                splash_top_rect = text_line[TextTuple.Surface].get_rect(left=text_left, top=text_top)
-                Displays.screen.blit(text_line[TextTuple.Surface], splash_top_rect)
-                splash_text_offset += text_line[TextTuple.Height] + text_line[TextTuple.VPadding]
-        pygame.display.flip()
+            if self.surface is None or \
+                    self.get_surface_key(self.get_text_lines(self.text)) != self.surface_key:
+                self.prerender()
+            else:
+                SurfaceCache.touch(SurfaceCacheName.Splashes, self)
+            Surfaces.blit(Displays.screen, self.surface, (0, 0))
+        Compositor.add_full()
+        Compositor.present()
         if self.timeout > 0:
             Timer.timeout(self.timeout, ignore_reset=True)
         Backlight.screen_wake()
@@ -1211,16 +2394,23 @@ class Dialog(Display):
     dialog_type = DialogStyle.Ok
     use_menu_timeout = False
     use_menu_colors = False
+    modal = False
+    modal_margin = None
+    snapshot = None
+    snapshot_display = None
+    snapshot_key = None
 
     ##################################################################################
     # DIALOG INIT METHOD
     ##################################################################################
-    # Initialize the Dialog class with defaults
+    # Initialize the Dialog class with defaults.  When modal is True, the dialog is
+    # drawn as an overlay inset by modal_margin pixels over the last core display
+    # instead of replacing the whole screen.
     ##################################################################################
     def __init__(self, text=None, dialog_type=DialogStyle.Ok, background_color=Defaults.default_dialog_background_color,
                  border_color=Defaults.default_dialog_border_color, border_width=None, actions=None, buttons=None,
                  timeout=Defaults.default_dialog_timeout, timeout_function=None, draw_callback=None,
-                 use_menu_timeout=False, use_menu_colors=False):
+                 use_menu_timeout=False, use_menu_colors=False, modal=False, modal_margin=None):
 
         super(Dialog, self).__init__(background_color=background_color, border_color=border_color,
                                      border_width=border_width, buttons=buttons, actions=actions, timeout=timeout,
@@ -1231,13 +2421,97 @@ class Dialog(Display):
         self.dialog_type = dialog_type
         self.use_menu_timeout = use_menu_timeout
         self.use_menu_colors = use_menu_colors
+        self.modal = modal
+        self.modal_margin = modal_margin
+        self.layout = TextLayout()
+        if self.modal_margin is None:
+            self.modal_margin = Defaults.default_dialog_modal_margin
         self.is_core = False
 
+    ##################################################################################
+    # DIALOG GET_REGION METHOD
+    ##################################################################################
+    # Returns the rectangle of the screen the dialog draws to.  This is the whole
+    # screen unless the dialog is modal.
+    ##################################################################################
+    def get_region(self):
+        if not self.modal:
+            return Rect(0, 0, Defaults.tft_width, Defaults.tft_height)
+        return Rect(self.modal_margin, self.modal_margin, Defaults.tft_width - (self.modal_margin * 2),
+                    Defaults.tft_height - (self.modal_margin * 2))
+
+    ##################################################################################
+    # DIALOG FIT_BUTTONS METHOD
+    ##################################################################################
+    # Scales the template buttons, which are laid out for the whole screen, so that
+    # they fit the same relative position within the region of a modal dialog.
+    ##################################################################################
+    def fit_buttons(self, region):
+        for button in self.buttons:
+            if button is not None:
+                left = region.x + (button.x * region.width / Defaults.tft_width)
+                top = region.y + (button.y * region.height / Defaults.tft_height)
+                button.width = region.x + ((button.x + button.width) * region.width / Defaults.tft_width) - left
+                button.height = region.y + ((button.y + button.height) * region.height / Defaults.tft_height) - top
+                button.x = left
+                button.y = top
+
+    ##################################################################################
+    # DIALOG INVALIDATE METHOD
+    ##################################################################################
+    # Drops the saved snapshot of the display under a modal dialog, so dismissing
+    # the dialog renders that display again.
+    ##################################################################################
+    def invalidate(self):
+        self.snapshot = None
+        SurfaceCache.release(SurfaceCacheName.Snapshots, self)
+        super(Dialog, self).invalidate()
+
+    ##################################################################################
+    # DIALOG GET_LINES METHOD
+    ##################################################################################
+    # Returns a list of the text lines of the dialog, including its buttons.
+    ##################################################################################
+    def get_lines(self):
+        lines = super(Dialog, self).get_lines()
+        for text_item in array_single_none(self.text):
+            lines.append(text_item if isinstance(text_item, BaseLine) else DialogLine(text_item))
+        return lines
+
+    ##################################################################################
+    # DIALOG RESTORE METHOD
+    ##################################################################################
+    # Called when a display is shown while the dialog is current.  If the dialog is
+    # modal and the display is the one it was shown over, the saved snapshot of that
+    # display is put back with a single blit, any dynamic header or footer of the
+    # display is refreshed and True is returned.  False is returned if the display
+    # needs a normal render.
+    ##################################################################################
+    def restore(self, display):
+        snapshot = self.snapshot
+        self.snapshot = None
+        SurfaceCache.release(SurfaceCacheName.Snapshots, self)
+        if snapshot is None or display is not self.snapshot_display or display.force_refresh or \
+                display.get_backbuffer_key() != self.snapshot_key:
+            return False
+        region = self.get_region()
+        Surfaces.blit(Displays.screen, snapshot, region, region)
+        Compositor.add(region)
+        for headfoot in display.get_headfoots():
+            if not headfoot.is_static():
+                headfoot.render(display, True)
+        Compositor.present()
+        Timer.timeout(display.timeout)
+        Backlight.screen_wake()
+        return True
+
     ##################################################################################
     # DIALOG RENDER METHOD
     ##################################################################################
     # Method to render a Dialog display Dialog Text, background, buttons and borders.
-    # The dialog type can be a predefined template or can be custom.
+    # The dialog type can be a predefined template or can be custom.  A modal dialog
+    # saves a snapshot of the last core display before drawing only its own region
+    # over it, so dismissing it back to that display only restores the snapshot.
     ##################################################################################
     def render(self, data=None):
         # No need to render unless current display
@@ -1256,6 +2530,7 @@ class Dialog(Display):
             display_background_color = core_display.background_color
             display_border_color = core_display.border_color
             display_border_width = core_display.border_width
+        region = self.get_region()
         # Create Buttons if there are none already created and no custom buttons
         if self.dialog_type != DialogStyle.Custom and not self.buttons:
             self.buttons = []
@@ -1300,16 +2575,30 @@ class Dialog(Display):
                 self.buttons = tfttemplates.get_buttons(ButtonTemplate.Bottom1x1, names=[DialogButtonText.OK],
                                                         actions=self.actions, background_color=button_background_color,
                                                         border_color=button_background_color)
+            if self.modal:
+                self.fit_buttons(region)
+        # Save the screen under a modal dialog so it can be restored when dismissed.
+        # The core display is composed first if it is not what is on the screen, in
+        # which case the whole screen has changed and is pushed.
+        composed = False
+        if self.modal and core_display is not None:
+            if Displays.current is not core_display:
+                core_display.compose()
+                composed = True
+            self.snapshot = Displays.screen.copy()
+            self.snapshot_display = core_display
+            self.snapshot_key = core_display.get_backbuffer_key()
+            SurfaceCache.track(SurfaceCacheName.Snapshots, self, [self.snapshot], Dialog.invalidate)
         # Draw Borders and Background
-        Displays.screen.fill(display_background_color)
-        draw_true_rect(Displays.screen, display_border_color, 0, 0, Defaults.tft_width - 1, Defaults.tft_height - 1,
-                       display_border_width)
+        Displays.screen.fill(Surfaces.map_color(display_background_color), region)
+        draw_true_rect(Displays.screen, display_border_color, region.x, region.y, region.width - 1,
+                       region.height - 1, display_border_width)
         if not self.buttons or self.dialog_type == DialogStyle.FullScreenOk:
-            dialog_text_area_height = Defaults.tft_height - display_border_width
+            dialog_text_area_height = region.height - display_border_width
         else:
-            button_pos = get_buttons_start_height(self.buttons)
-            if button_pos > Defaults.tft_height - (display_border_width * 2):
-                dialog_text_area_height = Defaults.tft_height - (display_border_width * 2)
+            button_pos = get_buttons_start_height(self.buttons) - region.y
+            if button_pos > region.height - (display_border_width * 2):
+                dialog_text_area_height = region.height - (display_border_width * 2)
             else:
                 dialog_text_area_height = button_pos - display_border_width
             # dialog_text_area_height = get_buttons_start_height(self.buttons)
@@ -1318,10 +2607,8 @@ class Dialog(Display):
         else:
             render_text = array_single_none(self.text)
         if render_text:
-            dialog_text_tuples = []
-            dialog_text_height = 0
+            text_lines = []
             text_v_align = None
-            last_item = None
             for text_item in render_text:
                 if not isinstance(text_item, BaseLine):
                     text_item = DialogLine(text_item)
@@ -1329,43 +2616,22 @@ class Dialog(Display):
                     text_item.text = ""
                 elif text_v_align is None:
                     text_v_align = text_item.font_v_align
-                text_surface, text_font_rect = text_item.render(display_background_color)
-                text_width = text_font_rect.width
-                text_height = text_font_rect.height
-                tuple_text = (text_surface, text_width, text_height, text_item.font_h_align, text_item.font_h_padding,
-                              text_item.font_v_padding)
-                last_text_height = text_height + text_item.font_v_padding
-                dialog_text_height += last_text_height
-                dialog_text_tuples.append(tuple_text)
-                last_item = text_item
-            dialog_text_offset = 0
-            if text_v_align is not TextVAlign.Top:
-                dialog_text_height -= last_item.font_v_padding
-            for text_line in dialog_text_tuples:
-                # Handle horizontal alignment
-                if text_line[TextTuple.HAlign] == TextHAlign.Left:
-                    text_left = display_border_width + text_line[TextTuple.HPadding]
-                elif text_line[TextTuple.HAlign] == TextHAlign.Right:
-                    text_left = Defaults.tft_width - text_line[TextTuple.Width] - \
-                               text_line[TextTuple.HPadding] - display_border_width
-                else:
-                    text_left = (Defaults.tft_width - text_line[TextTuple.Width]) / 2
-                # Handle vertical alignment
-                if text_v_align == TextVAlign.Top:
-                    text_top = display_border_width + text_line[TextTuple.VPadding] + dialog_text_offset
-                elif text_v_align == TextVAlign.Bottom:
-                    text_top = dialog_text_area_height - dialog_text_height - text_line[TextTuple.VPadding] +\
-                               dialog_text_offset
-                else:
-                    text_top = ((dialog_text_area_height - dialog_text_height) / 2) +\
-                               dialog_text_offset + display_border_width
-                dialog_top_rect = text_line[TextTuple.Surface].get_rect(left=text_left, top=text_top)
-                Displays.screen.blit(text_line[TextTuple.Surface], dialog_top_rect)
-                dialog_text_offset += text_line[TextTuple.Height] + text_line[TextTuple.VPadding]
+                text_lines.append(text_item)
+            dialog_box = Rect(region.x + display_border_width, region.y + display_border_width,
+                              region.width - (display_border_width * 2), dialog_text_area_height)
+            area_width = region.width - (display_border_width * 2) if self.modal else None
+            for text_surface, text_rect in self.layout.layout(text_lines, dialog_box, text_v_align,
+                                                              display_background_color, area_width,
+                                                              bottom=region.y + dialog_text_area_height):
+                Surfaces.blit(Displays.screen, text_surface, text_rect)
         # Draw buttons unless we are using full screen button
         if self.dialog_type != DialogStyle.FullScreenOk:
             self.render_buttons()
-        pygame.display.flip()
+        if self.modal and not composed:
+            Compositor.add(region)
+        else:
+            Compositor.add_full()
+        Compositor.present()
         Backlight.screen_wake()
         # Set the Screen Timeout if using the previous display's timeout
         if core_display is not None and self.use_menu_timeout:
@@ -1388,7 +2654,9 @@ class Header(object):
     height = 0
     refresh = None
     last_update = None
+    next_update = None
     location = None
+    last_drawn = None
 
     ##################################################################################
     # HEADER INIT METHOD
@@ -1407,6 +2675,7 @@ class Header(object):
         self.height = height
         self.refresh = refresh
         self.location = HeadFootLocation.Top
+        self.layout = TextLayout()
         if self.refresh is None:
             if self.mode == HeadFootType.Date:
                 self.refresh = DisplayHeaderRefresh.Day
@@ -1417,15 +2686,44 @@ class Header(object):
             else:
                 self.refresh = DisplayHeaderRefresh.NoRefresh
 
+    ##################################################################################
+    # HEADER IS_STATIC METHOD
+    ##################################################################################
+    # Returns True if the header (or footer) text only changes when the header is
+    # changed.  Headers with times, dates, host names, IP addresses or user functions
+    # are dynamic and are rendered each time the display is shown.
+    ##################################################################################
+    def is_static(self):
+        return self.mode == HeadFootType.NoDisplay or self.mode == HeadFootType.UserText
+
+    ##################################################################################
+    # HEADER GET_RENDER_KEY METHOD
+    ##################################################################################
+    # Returns a tuple of everything that affects how a static header looks on the
+    # display passed in.  Only the position is included for dynamic headers as their
+    # text is rendered again on every show.
+    ##################################################################################
+    def get_render_key(self, display):
+        if not self.is_static():
+            return self.mode, self.location, self.height
+        return (self.mode, self.location, self.height, self.text.get_render_key(display.background_color),
+                self.text.font_h_align, self.text.font_v_align, self.text.font_h_padding, self.text.font_v_padding)
+
     ##################################################################################
     # HEADER (AND FOOTER) RENDER METHOD
     ##################################################################################
     # Method to render the text for a header or footer using the predefined types.  A
     # header or footer can contain a refresh property that determines how often the
     # header or footer is redrawn.  This can be used to provide dynamic headers and
-    # footers on a Menu display.
-    ##################################################################################
-    def render(self, display, clear=False):
+    # footers on a Menu display.  It is drawn to the screen unless another surface
+    # (like a display backbuffer) is passed in.  The text of dynamic headers is drawn
+    # from the GlyphAtlas where it can be, and when the text on the screen is only
+    # being refreshed (clear is True) and keeps the same rect, only the characters
+    # that changed are drawn.  The time of the next refresh is set on each render.
+    ##################################################################################
+    def render(self, display, clear=False, surface=None):
+        self.last_update = time.time()
+        self.next_update = self.get_next_update(self.last_update)
         # Get Header Text based on mode.  If HeadFootType.UserText, nothing changes
         if self.mode == HeadFootType.NoDisplay:
             return
@@ -1463,9 +2761,6 @@ class Header(object):
         if self.text.text is None:
             self.text.text = ""
         # Draw Header
-        headfoot_surface, headfoot_font_rect = self.text.render(display.background_color)
-        headfoot_text_width = headfoot_font_rect.width
-        headfoot_text_height = headfoot_font_rect.height
         if self.height is None:
             if self.location is HeadFootLocation.Bottom:
                 button_pos = get_buttons_end_height(display.buttons)
@@ -1486,79 +2781,140 @@ class Header(object):
             headfoot_offset = display.border_width
         else:
             headfoot_offset = button_pos
-        # Handle horizontal alignment
-        if self.text.font_h_align == TextHAlign.Left:
-            headfoot_text_left = display.border_width + self.text.font_h_padding
-        elif self.text.font_h_align == TextHAlign.Right:
-            headfoot_text_left = Defaults.tft_width - headfoot_text_width - display.border_width - \
-                               self.text.font_h_padding
-        else:
-            headfoot_text_left = (Defaults.tft_width - headfoot_text_width) / 2
-        # Handle vertical alignment
-        if self.text.font_v_align == TextVAlign.Top:
-            headfoot_text_top = headfoot_offset + self.text.font_v_padding
-        elif self.text.font_v_align == TextVAlign.Bottom:
-            headfoot_text_top = (true_headfoot_height + headfoot_offset) - headfoot_text_height -\
-                              self.text.font_v_padding
-        else:
-            headfoot_text_top = (((true_headfoot_height / 2) - (headfoot_text_height / 2)) + headfoot_offset)
-
-        headfoot_text_rect = headfoot_surface.get_rect(left=headfoot_text_left, top=headfoot_text_top)
+        headfoot_box = Rect(display.border_width, headfoot_offset,
+                            Defaults.tft_width - (display.border_width * 2), true_headfoot_height)
+        self.text.glyph_atlas = not self.is_static()
+        (headfoot_surface, headfoot_text_rect), = self.layout.layout([self.text], headfoot_box,
+                                                                     self.text.font_v_align,
+                                                                     display.background_color)
+        if surface is None:
+            surface = Displays.screen
         headfoot_background_rect = None
         if clear:
             headfoot_background_rect = Rect(display.border_width, headfoot_offset,
                                             Defaults.tft_width - (display.border_width * 2) - 1,
                                             true_headfoot_height)
-            draw_true_with_rect(Displays.screen, display.background_color, headfoot_background_rect, 0)
-        Displays.screen.blit(headfoot_surface, headfoot_text_rect)
+        if surface is Displays.screen:
+            changed_rects = None
+            if clear and headfoot_background_rect.contains(headfoot_text_rect):
+                changed_rects = self.get_changed_rects(headfoot_text_rect, display.background_color)
+            self.last_drawn = (headfoot_text_rect, display.background_color, self.text.text)
+            if changed_rects is not None:
+                for changed_rect in changed_rects:
+                    screen_rect = changed_rect.move(headfoot_text_rect.topleft)
+                    draw_true_with_rect(surface, display.background_color, screen_rect, 0)
+                    Surfaces.blit(surface, headfoot_surface, screen_rect, changed_rect)
+                    Compositor.add(screen_rect)
+                return
         if clear:
-            pygame.display.update(headfoot_background_rect)
+            draw_true_with_rect(surface, display.background_color, headfoot_background_rect, 0)
+        Surfaces.blit(surface, headfoot_surface, headfoot_text_rect)
+        if clear and surface is Displays.screen:
+            Compositor.add(headfoot_background_rect)
+
+    ##################################################################################
+    # HEADER GET_CHANGED_RECTS METHOD
+    ##################################################################################
+    # Returns the rects (inside the text rect) of the characters that changed since
+    # the text was last drawn on the screen, or None if the whole header has to be
+    # drawn again because the text can't be drawn from the GlyphAtlas or it moved.
+    ##################################################################################
+    def get_changed_rects(self, headfoot_text_rect, background_color):
+        if self.last_drawn is None or self.last_drawn[:2] != (headfoot_text_rect, background_color) or \
+                not self.text.glyph_atlas:
+            return None
+        with FontCache.lock:
+            font = FontCache.get_font(self.text.font, self.text.font_size, self.text.font_style)
+            font.pad = self.text.font_pad
+            atlas = GlyphAtlas.get_atlas(font, self.text.font_color)
+            if atlas is None:
+                return None
+            return atlas.get_changed_rects(self.last_drawn[2], self.text.text)
+
+    ##################################################################################
+    # HEADER GET_REFRESH_PERIOD METHOD
+    ##################################################################################
+    # Returns the number of seconds between refreshes for the DisplayHeaderRefresh
+    # of the header (0 for DisplayHeaderRefresh.All), or None if it is not refreshed.
+    ##################################################################################
+    def get_refresh_period(self):
+        if self.refresh == DisplayHeaderRefresh.Second:
+            return 1
+        elif self.refresh == DisplayHeaderRefresh.Minute:
+            return 60
+        elif self.refresh == DisplayHeaderRefresh.Hour:
+            return 3600
+        elif self.refresh == DisplayHeaderRefresh.Day:
+            return 86400
+        elif self.refresh == DisplayHeaderRefresh.All:
+            return 0
+        return None
+
+    ##################################################################################
+    # HEADER GET_NEXT_UPDATE METHOD
+    ##################################################################################
+    # Returns the time of the next refresh after the time passed in: the start of
+    # the next second, minute, hour or day (in local time, so days and hours follow
+    # daylight saving time changes), the time passed in for DisplayHeaderRefresh.All
+    # or None if the header is not refreshed.
+    ##################################################################################
+    def get_next_update(self, now):
+        period = self.get_refresh_period()
+        if not period:
+            return now if period == 0 else None
+        if self.refresh == DisplayHeaderRefresh.Second:
+            return math.floor(now) + 1
+        local_time = time.localtime(now)
+        if self.refresh == DisplayHeaderRefresh.Minute:
+            next_time = local_time[:4] + (local_time[TimeStruct.Minute] + 1, 0)
+        elif self.refresh == DisplayHeaderRefresh.Hour:
+            next_time = local_time[:3] + (local_time[TimeStruct.Hour] + 1, 0, 0)
+        else:
+            next_time = local_time[:2] + (local_time[TimeStruct.MonthDay] + 1, 0, 0, 0)
+        next_update = time.mktime(next_time + (0, 0, -1))
+        # A daylight saving time change can repeat or skip an hour, so the next
+        # refresh is never more than one period away
+        if not now < next_update <= now + period:
+            next_update = now + period
+        return next_update
+
+    ##################################################################################
+    # HEADER GET_UPDATE_WAIT METHOD
+    ##################################################################################
+    # Returns the number of seconds from the time passed in until the header is due
+    # to be refreshed, or None if it is not refreshed.  The wait is never longer
+    # than the refresh period, so a clock set back is noticed within one period.
+    ##################################################################################
+    def get_update_wait(self, now):
+        if self.next_update is None:
+            return None
+        if now < self.last_update:
+            return 0
+        return min(max(self.next_update - now, 0), self.get_refresh_period()) + Times.WakeMargin
 
     ##################################################################################
     # HEADER UPDATE METHOD
     ##################################################################################
-    # Method that updates (refreshes) a Header (or Footer) item.  Uses the
-    # DisplayHeaderRefresh parameter to decide what to update.  The use_two_second_-
-    # range allows for an update to occur in either the first or second second after
-    # an event occurs.  This allows slower systems to still process an event should
-    # a process delay the initial notification.
+    # Method that updates (refreshes) a Header (or Footer) item.  Each render works
+    # out the time of the next refresh from the DisplayHeaderRefresh of the header
+    # (see get_next_update), so the header is only drawn again once that time has
+    # come.  A refresh that comes late (the loop was held up or the clock jumped
+    # forward) is done once and the clock being set back starts the schedule again.
     ##################################################################################
     def update(self, display):
         if self.refresh == DisplayHeaderRefresh.NoRefresh:
             return
-        cur_time = int(time.time())
-        local_time = time.localtime(cur_time)
-        # Set Header Refresh if Date/Time is used
-        if self.refresh == DisplayHeaderRefresh.Day:
-            if local_time[TimeStruct.Hour] != 0 or local_time[TimeStruct.Minute] != 0 or\
-                            local_time[TimeStruct.Second] != 0:
-                return
-            use_two_second_range = True
-        elif self.refresh == DisplayHeaderRefresh.Hour:
-            if local_time[TimeStruct.Minute] != 0 or local_time[TimeStruct.Second] != 0:
-                return
-            use_two_second_range = True
-        elif self.refresh == DisplayHeaderRefresh.Minute:
-            if local_time[TimeStruct.Second] != 0:
+        if self.next_update is None:
+            if self.get_refresh_period() is None:
+                logger.warning("Unknown header refresh value ({0}).  Unable to set header refresh.".format(
+                    self.refresh))
+                self.refresh = DisplayHeaderRefresh.NoRefresh
                 return
-            use_two_second_range = True
-        elif self.refresh == DisplayHeaderRefresh.Second:
-            use_two_second_range = False
-        elif self.refresh == DisplayHeaderRefresh.All:
-            use_two_second_range = None
         else:
-            logger.warning("Unknown header refresh value ({0}).  Unable to set header refresh.".format(self.refresh))
-            return
-        # TODO fix issue with wrap around on seconds
-        if use_two_second_range is not None:
-            if use_two_second_range:
-                if self.last_update == cur_time or self.last_update == cur_time - 1:
-                    return
-            else:
-                if self.last_update == cur_time:
-                    return
+            now = time.time()
+            if self.last_update <= now < self.next_update:
+                return
         self.render(display, True)
-        self.last_update = cur_time
 
 
 ##################################################################################
@@ -1597,6 +2953,8 @@ class Button(object):
     width = 0
     action = None
     action_right = None
+    render_key = None
+    surfaces = None
 
     ##################################################################################
     # BUTTON INIT METHOD
@@ -1629,45 +2987,147 @@ class Button(object):
             self.border_width = Defaults.default_button_border_width
 
     ##################################################################################
-    # BUTTON RENDER METHOD
+    # BUTTON SET_ATTRIBUTES METHOD
     ##################################################################################
-    # Method to render the a button including text.  The solid parameter indicates if
-    # the button is an outline only (when False) or a solid rectangle (when True)
+    # Sets the attributes of the button that are passed in (not None).  Text that is
+    # not a line replaces the text of the current line, keeping its font settings.
     ##################################################################################
-    def render(self, solid=False):
-        # No text means we don't render a button.
-        if isinstance(self.text, BaseLine) and self.text.text is None:
-            return None
+    def set_attributes(self, text=None, background_color=None, border_color=None, border_width=None,
+                       font_color=None):
+        if text is not None:
+            if isinstance(text, BaseLine):
+                self.text = text
+            elif isinstance(self.text, BaseLine):
+                self.text.text = unicode(text)
+            else:
+                self.text = ButtonLine(unicode(text))
+        if background_color is not None:
+            self.background_color = background_color
+        if border_color is not None:
+            self.border_color = border_color
+        if border_width is not None:
+            self.border_width = border_width
+        if font_color is not None:
+            if not isinstance(self.text, BaseLine):
+                self.text = ButtonLine(unicode(self.text))
+            self.text.font_color = font_color
+
+    ##################################################################################
+    # BUTTON UPDATE METHOD
+    ##################################################################################
+    # Changes the attributes of the button that are passed in and repaints only the
+    # button if it is on the current display (see Display.update_button), instead
+    # of setting force_refresh on the display.  Returns the rectangle repainted or
+    # None if nothing was repainted.
+    ##################################################################################
+    def update(self, text=None, background_color=None, border_color=None, border_width=None, font_color=None):
+        display = Displays.current
+        if display is not None and self in display.buttons:
+            return display.update_button(self, text=text, background_color=background_color,
+                                         border_color=border_color, border_width=border_width, font_color=font_color)
+        self.set_attributes(text=text, background_color=background_color, border_color=border_color,
+                            border_width=border_width, font_color=font_color)
+        return None
+
+    ##################################################################################
+    # BUTTON GET_RENDER_KEY METHOD
+    ##################################################################################
+    # Returns a tuple of everything that affects how the button looks.  The idle and
+    # pressed surfaces of the button are rebuilt whenever this key changes.  The
+    # text box is set on the line first so an auto fit line is keyed (and rendered)
+    # at the size that fits the button.
+    ##################################################################################
+    def get_render_key(self):
         if not isinstance(self.text, BaseLine):
-            self.text = ButtonLine(unicode(self.text))
-        # Draw background color of button to reset the screen
-        draw_true_rect(Displays.screen, self.background_color, self.x, self.y, self.width, self.height, 0)
+            return self.text
+        if self.text.auto_fit:
+            self.text.fit_box = self.get_text_box()
+        return (self.text.get_render_key(self.background_color), self.text.font_h_align, self.text.font_v_align,
+                self.text.font_h_padding, self.text.font_v_padding,
+                tuple(self.background_color) if self.background_color is not None else None,
+                tuple(self.border_color) if self.border_color is not None else None,
+                self.border_width, self.width, self.height)
+
+    ##################################################################################
+    # BUTTON GET_TEXT_BOX METHOD
+    ##################################################################################
+    # Returns the width and height inside the border and text padding of the button.
+    ##################################################################################
+    def get_text_box(self):
+        return (max(self.width - ((self.border_width + self.text.font_h_padding) * 2), 0),
+                max(self.height - ((self.border_width + self.text.font_v_padding) * 2), 0))
+
+    ##################################################################################
+    # BUTTON INVALIDATE METHOD
+    ##################################################################################
+    # Drops the pre-rendered surfaces so they are rebuilt on the next render.
+    ##################################################################################
+    def invalidate(self):
+        self.render_key = None
+        self.surfaces = None
+        SurfaceCache.release(SurfaceCacheName.Buttons, self)
+
+    ##################################################################################
+    # BUTTON RENDER_SURFACE METHOD
+    ##################################################################################
+    # Method that draws the button, including text, onto a new off-screen surface the
+    # size of the button.  The solid parameter indicates if the button is an outline
+    # only (when False) or a solid rectangle (when True).  The outline is blitted from
+    # the frame cache so buttons of the same size and style share one frame.
+    ##################################################################################
+    def render_surface(self, solid=False):
+        button_surface = Surfaces.create((self.width, self.height))
+        # Draw background color of button
+        draw_true_rect(button_surface, self.background_color, 0, 0, self.width, self.height, 0)
         # If solid is true, make the entire button colored in, otherwise, just draw border
-        if solid:
-            button_rect = draw_true_rect(Displays.screen, self.border_color,
-                                         self.x, self.y, self.width, self.height, 0)
+        if solid or self.border_width == 0:
+            draw_true_rect(button_surface, self.border_color, 0, 0, self.width, self.height, 0)
         else:
-            button_rect = draw_true_rect(Displays.screen, self.border_color,
-                                         self.x, self.y, self.width, self.height, self.border_width)
+            blit_frame(button_surface, self.border_color, 0, 0, self.width, self.height, self.border_width)
         # Render text to get its size
-        button_surface, button_font_rect = self.text.render(self.background_color)
-        button_text_width = button_font_rect.width
-        button_text_height = button_font_rect.height
+        text_surface, text_font_rect = self.text.render(self.background_color)
+        button_text_width = text_font_rect.width
+        button_text_height = text_font_rect.height
         # Handle horizontal alignment
         if self.text.font_h_align == TextHAlign.Left:
-            button_text_left = self.x + self.border_width + self.text.font_h_padding
+            button_text_left = self.border_width + self.text.font_h_padding
         elif self.text.font_h_align == TextHAlign.Right:
-            button_text_left = (self.x + self.width) - self.border_width - button_text_width - self.text.font_h_padding
+            button_text_left = self.width - self.border_width - button_text_width - self.text.font_h_padding
         else:
-            button_text_left = (self.x + (self.width / 2)) - (button_text_width / 2)
+            button_text_left = (self.width / 2) - (button_text_width / 2)
         # Handle vertical alignment
         if self.text.font_v_align == TextVAlign.Top:
-            button_text_top = self.y + self.border_width + self.text.font_v_padding
+            button_text_top = self.border_width + self.text.font_v_padding
         elif self.text.font_v_align == TextVAlign.Bottom:
-            button_text_top = (self.y + self.height) - self.border_width - button_text_height - self.text.font_v_padding
+            button_text_top = self.height - self.border_width - button_text_height - self.text.font_v_padding
         else:
-            button_text_top = (self.y + (self.height / 2)) - (button_text_height / 2)
-        button_text_rect = button_surface.get_rect(left=button_text_left, top=button_text_top)
-        # Block transfer the text on the screen
-        Displays.screen.blit(button_surface, button_text_rect)
-        return button_rect
+            button_text_top = (self.height / 2) - (button_text_height / 2)
+        Surfaces.blit(button_surface, text_surface, text_surface.get_rect(left=button_text_left, top=button_text_top))
+        return button_surface
+
+    ##################################################################################
+    # BUTTON RENDER METHOD
+    ##################################################################################
+    # Method to render the a button including text.  The solid parameter indicates if
+    # the button is an outline only (when False) or a solid rectangle (when True).
+    # The idle and pressed looks of the button are drawn once to off-screen surfaces
+    # and rebuilt only when the text, colors, border or size change, so showing
+    # either state is a single blit.  The button is drawn to the screen unless
+    # another surface is passed in.
+    ##################################################################################
+    def render(self, solid=False, surface=None):
+        # No text means we don't render a button.
+        if isinstance(self.text, BaseLine) and self.text.text is None:
+            return None
+        if not isinstance(self.text, BaseLine):
+            self.text = ButtonLine(unicode(self.text))
+        render_key = self.get_render_key()
+        if self.surfaces is None or render_key != self.render_key:
+            self.surfaces = (self.render_surface(False), self.render_surface(True))
+            self.render_key = render_key
+            SurfaceCache.track(SurfaceCacheName.Buttons, self, self.surfaces, Button.invalidate)
+        else:
+            SurfaceCache.touch(SurfaceCacheName.Buttons, self)
+        # Block transfer the button on the screen
+        return Surfaces.blit(surface if surface is not None else Displays.screen, self.surfaces[1 if solid else 0],
+                             (self.x, self.y))
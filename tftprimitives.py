@@ -0,0 +1,148 @@
+#!/usr/bin/python
+##################################################################################
+# IMPORTS
+##################################################################################
+import logging
+from collections import OrderedDict
+import pygame
+from tftsurface import *
+
+##################################################################################
+# CONFIGURE LOGGING
+##################################################################################
+# Uses the 'tftmenu' logger configured in the tftutility module.  This module is
+# imported by tftutility, so it can't import tftutility itself.
+##################################################################################
+logger = logging.getLogger("tftmenu")
+logger.debug("Loading Primitives Module")
+
+
+##################################################################################
+# FRAME COLOR KEY CONSTANTS
+##################################################################################
+# Colors tried, in order, for the transparent inside of a cached frame.  The first
+# one that does not map to the same pixel value as the frame color is used.
+##################################################################################
+FRAME_COLOR_KEYS = [(255, 0, 255), (0, 255, 0), (0, 0, 255)]
+
+
+##################################################################################
+# GET_FRAME_RECTS METHOD
+##################################################################################
+# Returns the list of rectangles (at most four) that make up a square border of
+# border_width pixels inside the rectangle passed in.  A border that fills the
+# whole rectangle is returned as the single rectangle.
+##################################################################################
+def get_frame_rects(x, y, width, height, border_width):
+    if width <= 0 or height <= 0:
+        return []
+    if border_width * 2 >= width or border_width * 2 >= height:
+        return [pygame.Rect(x, y, width, height)]
+    return [pygame.Rect(x, y, width, border_width),
+            pygame.Rect(x, y + height - border_width, width, border_width),
+            pygame.Rect(x, y + border_width, border_width, height - (border_width * 2)),
+            pygame.Rect(x + width - border_width, y + border_width, border_width, height - (border_width * 2))]
+
+
+##################################################################################
+# DRAW_FRAME METHOD
+##################################################################################
+# Draws a square border of border_width pixels inside the rectangle passed in with
+# at most four fills.  Returns the rectangle of the surface that was changed (the
+# frame clipped to the surface) for use in dirty tracking.
+##################################################################################
+def draw_frame(surface, color, x, y, width, height, border_width):
+    for frame_rect in get_frame_rects(x, y, width, height, border_width):
+        surface.fill(color, frame_rect)
+    return pygame.Rect(x, y, max(width, 0), max(height, 0)).clip(surface.get_clip())
+
+
+##################################################################################
+# FRAME CACHE CLASS
+##################################################################################
+# Process-wide cache of pre-drawn border frames.  Each frame is a surface the size
+# of the border with a transparent (color keyed) inside, so a frame can be blitted
+# in one call over any background.  Frames are kept per size, border width, color
+# and pixel format and the least recently used frame is dropped once the cache
+# holds more than max_size frames.
+##################################################################################
+class FrameCache:
+    max_size = 64
+    hits     = 0
+    misses   = 0
+    frames   = OrderedDict()
+
+    ##################################################################################
+    # FRAME CACHE GET_FRAME METHOD
+    ##################################################################################
+    # Returns the cached frame surface for the size, border width and color passed
+    # in.  The frame is drawn and added to the cache if it has not been used before.
+    # The format surface is the one the frame will be blitted to, if given, so the
+    # frame is converted to its pixel format.
+    ##################################################################################
+    @classmethod
+    def get_frame(cls, width, height, border_width, color, format_surface=None):
+        if format_surface is not None:
+            pixel_format = (format_surface.get_bitsize(), format_surface.get_masks())
+        else:
+            pixel_format = None
+        key = (width, height, border_width, tuple(color), pixel_format)
+        frame = cls.frames.pop(key, None)
+        if frame is not None:
+            cls.hits += 1
+            SurfaceCache.touch(SurfaceCacheName.Frames, frame)
+        else:
+            cls.misses += 1
+            if format_surface is not None:
+                frame = pygame.Surface((width, height), 0, format_surface)
+            else:
+                frame = pygame.Surface((width, height))
+            if border_width * 2 < width and border_width * 2 < height:
+                mapped_color = frame.map_rgb(color)
+                for color_key in FRAME_COLOR_KEYS:
+                    if frame.map_rgb(color_key) != mapped_color:
+                        frame.fill(color_key)
+                        frame.set_colorkey(color_key, pygame.RLEACCEL)
+                        break
+            draw_frame(frame, color, 0, 0, width, height, border_width)
+            while len(cls.frames) >= cls.max_size > 0:
+                cls.frames.popitem(last=False)
+            SurfaceCache.track(SurfaceCacheName.Frames, frame, [frame], cls.discard)
+        cls.frames[key] = frame
+        return frame
+
+    ##################################################################################
+    # FRAME CACHE DISCARD METHOD
+    ##################################################################################
+    # Removes the frame passed in from the cache.
+    ##################################################################################
+    @classmethod
+    def discard(cls, frame):
+        for key, cached_frame in cls.frames.items():
+            if cached_frame is frame:
+                del cls.frames[key]
+
+    ##################################################################################
+    # FRAME CACHE CLEAR METHOD
+    ##################################################################################
+    # Removes all frames from the cache and resets the hit and miss counters.
+    ##################################################################################
+    @classmethod
+    def clear(cls):
+        cls.frames.clear()
+        cls.hits = 0
+        cls.misses = 0
+
+
+##################################################################################
+# BLIT_FRAME METHOD
+##################################################################################
+# Draws a square border of border_width pixels inside the rectangle passed in by
+# blitting the cached frame for its size, border width and color.  Returns the
+# rectangle of the surface that was changed.
+##################################################################################
+def blit_frame(surface, color, x, y, width, height, border_width):
+    if width <= 0 or height <= 0 or border_width <= 0:
+        return pygame.Rect(x, y, 0, 0)
+    frame = FrameCache.get_frame(width, height, border_width, color, surface)
+    return Surfaces.blit(surface, frame, (x, y))
@@ -0,0 +1,300 @@
+#!/usr/bin/python
+##################################################################################
+# IMPORTS
+##################################################################################
+import logging
+import weakref
+from collections import OrderedDict
+import pygame
+import pygame.display
+
+##################################################################################
+# CONFIGURE LOGGING
+##################################################################################
+# Uses the 'tftmenu' logger configured in the tftutility module.  This module is
+# imported by tftutility, so it can't import tftutility itself.
+##################################################################################
+logger = logging.getLogger("tftmenu")
+logger.debug("Loading Surface Module")
+
+
+##################################################################################
+# SURFACES CLASS
+##################################################################################
+# Class that creates and converts surfaces to the pixel format of the screen.  A
+# surface in another format (like the 32-bit surfaces from the font renderer on
+# a 16-bit PiTFT framebuffer) is converted pixel by pixel on every blit, so any
+# surface that is kept and blitted more than once should come from create() or
+# be passed through convert().  Colors are mapped to the screen pixel value once
+# and kept.  The blit method counts blits of surfaces that still needed to be
+# converted so they can be tracked down.
+##################################################################################
+class Surfaces:
+    screen            = None
+    pixel_format      = None
+    alpha_format      = None
+    colors            = {}
+    conversions       = 0
+    blits             = 0
+    unconverted_blits = 0
+
+    ##################################################################################
+    # SURFACES SET_MODE METHOD
+    ##################################################################################
+    # Sets the display mode and keeps the screen and its pixel format for converting
+    # surfaces.  Returns the screen surface.
+    ##################################################################################
+    @classmethod
+    def set_mode(cls, size):
+        cls.screen = pygame.display.set_mode(size)
+        cls.pixel_format = cls.get_format(cls.screen)
+        cls.alpha_format = cls.get_format(pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha())
+        cls.colors.clear()
+        logger.debug("Screen pixel format set.  Bits: {0}, Masks: {1}".format(*cls.pixel_format))
+        return cls.screen
+
+    ##################################################################################
+    # SURFACES GET_FORMAT METHOD
+    ##################################################################################
+    # Returns a tuple of the bits per pixel and color masks of a surface.
+    ##################################################################################
+    @staticmethod
+    def get_format(surface):
+        return surface.get_bitsize(), surface.get_masks()
+
+    ##################################################################################
+    # SURFACES CREATE METHOD
+    ##################################################################################
+    # Returns a new surface of the size passed in that is in the screen pixel format
+    # (or the per-pixel alpha format for the screen when alpha is True).
+    ##################################################################################
+    @classmethod
+    def create(cls, size, alpha=False):
+        if cls.screen is None:
+            return pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+        if alpha:
+            return pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        return pygame.Surface(size, 0, cls.screen)
+
+    ##################################################################################
+    # SURFACES NEEDS_CONVERSION METHOD
+    ##################################################################################
+    # Returns True if blitting the surface to the screen requires converting each
+    # of its pixels.
+    ##################################################################################
+    @classmethod
+    def needs_conversion(cls, surface):
+        if cls.screen is None:
+            return False
+        if surface.get_flags() & pygame.SRCALPHA:
+            return cls.get_format(surface) != cls.alpha_format
+        return cls.get_format(surface) != cls.pixel_format
+
+    ##################################################################################
+    # SURFACES CONVERT METHOD
+    ##################################################################################
+    # Returns the surface converted to the screen pixel format, keeping per-pixel
+    # alpha if the surface has it.  The surface is returned as is if it is already
+    # in the screen format or the display mode has not been set.
+    ##################################################################################
+    @classmethod
+    def convert(cls, surface):
+        if not cls.needs_conversion(surface):
+            return surface
+        cls.conversions += 1
+        if surface.get_flags() & pygame.SRCALPHA:
+            return surface.convert_alpha()
+        return surface.convert()
+
+    ##################################################################################
+    # SURFACES MAP_COLOR METHOD
+    ##################################################################################
+    # Returns the screen pixel value of the color for filling surfaces in the screen
+    # pixel format.  The color is returned as is if the display mode is not set.
+    ##################################################################################
+    @classmethod
+    def map_color(cls, color):
+        if cls.screen is None or color is None:
+            return color
+        key = tuple(color)
+        mapped_color = cls.colors.get(key)
+        if mapped_color is None:
+            mapped_color = cls.screen.map_rgb(color)
+            cls.colors[key] = mapped_color
+        return mapped_color
+
+    ##################################################################################
+    # SURFACES BLIT METHOD
+    ##################################################################################
+    # Blits the source surface onto the destination surface (with the pygame blend
+    # special flags passed in, if any) and returns the changed rectangle.  Blits of
+    # surfaces that are not in the screen pixel format are counted and logged at
+    # debug level.
+    ##################################################################################
+    @classmethod
+    def blit(cls, destination, source, position, area=None, special_flags=0):
+        cls.blits += 1
+        if cls.needs_conversion(source):
+            cls.unconverted_blits += 1
+            logger.debug("Blit of unconverted surface.  Size: {0}, Bits: {1}".format(source.get_size(),
+                                                                                   source.get_bitsize()))
+        return destination.blit(source, position, area, special_flags)
+
+    ##################################################################################
+    # SURFACES RESET_STATS METHOD
+    ##################################################################################
+    # Resets the conversion and blit counters.
+    ##################################################################################
+    @classmethod
+    def reset_stats(cls):
+        cls.conversions = 0
+        cls.blits = 0
+        cls.unconverted_blits = 0
+
+
+##################################################################################
+# SURFACE CACHE NAME CONSTANTS
+##################################################################################
+# Names of the caches of retained surfaces that are tracked by the SurfaceCache.
+##################################################################################
+class SurfaceCacheName:
+    Lines       = "Lines"
+    Buttons     = "Buttons"
+    Backbuffers = "Backbuffers"
+    Snapshots   = "Snapshots"
+    Splashes    = "Splashes"
+    Frames      = "Frames"
+    Glyphs      = "Glyphs"
+
+
+##################################################################################
+# SURFACE CACHE CLASS
+##################################################################################
+# Class that keeps track of the memory used by every retained surface (rendered
+# text lines, button states, display backbuffers, etc.) so they share a single
+# memory budget.  The owner of the surfaces registers them with track() when they
+# are created, calls touch() when they are reused and release() when it drops
+# them.  The size of each entry is width * height * bytes per pixel of each of
+# its surfaces.  Once the total is over the budget (in bytes, 0 for no limit) the
+# least recently used entries of any cache are released by calling their release
+# function with the owner.  Owners are only weakly referenced, so an entry goes
+# away with its owner.
+##################################################################################
+class SurfaceCache:
+    budget      = 0
+    total_bytes = 0
+    entries     = OrderedDict()
+    evictions   = 0
+
+    ##################################################################################
+    # SURFACE CACHE SET_BUDGET METHOD
+    ##################################################################################
+    # Sets the memory budget in bytes (0 or None for no limit) and evicts entries if
+    # the cache is already over the new budget.
+    ##################################################################################
+    @classmethod
+    def set_budget(cls, budget):
+        cls.budget = budget or 0
+        cls.evict()
+
+    ##################################################################################
+    # SURFACE CACHE GET_BYTES METHOD
+    ##################################################################################
+    # Returns the number of bytes of pixel data held by a list of surfaces.
+    ##################################################################################
+    @staticmethod
+    def get_bytes(surfaces):
+        total = 0
+        for surface in surfaces:
+            if surface is not None:
+                width, height = surface.get_size()
+                total += width * height * surface.get_bytesize()
+        return total
+
+    ##################################################################################
+    # SURFACE CACHE TRACK METHOD
+    ##################################################################################
+    # Registers (or updates) the surfaces held by the owner in the named cache as
+    # the most recently used entry, then evicts other entries if over budget.  The
+    # release function is called with the owner to make it drop the surfaces.
+    ##################################################################################
+    @classmethod
+    def track(cls, cache, owner, surfaces, release):
+        key = (cache, id(owner))
+        cls.forget(key)
+        size = cls.get_bytes(surfaces)
+        owner_ref = weakref.ref(owner, lambda ref, forget_key=key: cls.forget(forget_key, ref))
+        cls.entries[key] = (owner_ref, size, release)
+        cls.total_bytes += size
+        cls.evict(key)
+
+    ##################################################################################
+    # SURFACE CACHE TOUCH METHOD
+    ##################################################################################
+    # Marks the surfaces held by the owner in the named cache as most recently used.
+    ##################################################################################
+    @classmethod
+    def touch(cls, cache, owner):
+        key = (cache, id(owner))
+        entry = cls.entries.pop(key, None)
+        if entry is not None:
+            cls.entries[key] = entry
+
+    ##################################################################################
+    # SURFACE CACHE RELEASE METHOD
+    ##################################################################################
+    # Removes the entry of the owner in the named cache.  Called by an owner when it
+    # drops its surfaces.
+    ##################################################################################
+    @classmethod
+    def release(cls, cache, owner):
+        cls.forget((cache, id(owner)))
+
+    ##################################################################################
+    # SURFACE CACHE FORGET METHOD
+    ##################################################################################
+    # Removes an entry by key.  If a weak reference is passed in, the entry is only
+    # removed if it still belongs to that reference.
+    ##################################################################################
+    @classmethod
+    def forget(cls, key, owner_ref=None):
+        entry = cls.entries.get(key)
+        if entry is not None and (owner_ref is None or entry[0] is owner_ref):
+            del cls.entries[key]
+            cls.total_bytes -= entry[1]
+
+    ##################################################################################
+    # SURFACE CACHE EVICT METHOD
+    ##################################################################################
+    # Releases the least recently used entries until the total is within budget.
+    # The entry with the key passed in (the one just added) is never released.
+    ##################################################################################
+    @classmethod
+    def evict(cls, keep_key=None):
+        if cls.budget <= 0:
+            return
+        for key in list(cls.entries.keys()):
+            if cls.total_bytes <= cls.budget:
+                break
+            if key == keep_key or key not in cls.entries:
+                continue
+            owner_ref, size, release = cls.entries[key]
+            cls.forget(key)
+            owner = owner_ref()
+            if owner is not None:
+                logger.debug("Surface cache evicting {0} bytes from {1} cache".format(size, key[0]))
+                release(owner)
+                cls.evictions += 1
+
+    ##################################################################################
+    # SURFACE CACHE USAGE METHOD
+    ##################################################################################
+    # Returns a dictionary of the number of entries and bytes used in each cache.
+    ##################################################################################
+    @classmethod
+    def usage(cls):
+        usage = {}
+        for key, entry in cls.entries.items():
+            count, size = usage.get(key[0], (0, 0))
+            usage[key[0]] = (count + 1, size + entry[1])
+        return usage
@@ -3,12 +3,24 @@
 # IMPORTS
 ##################################################################################
 import argparse
+import ctypes
+import ctypes.util
+import fcntl
+import heapq
+import io
 import logging
+import math
 import os
+import signal
 import socket
 import subprocess
+import threading
+import time
+from collections import OrderedDict
 import pygame
 import pygame.freetype
+from tftprimitives import *
+from tftsurface import *
 
 ##################################################################################
 # CONFIGURE LOGGING
@@ -171,6 +183,17 @@ class DialogButtonText:
     Cancel = "Cancel"
 
 
+##################################################################################
+# VIEWER BUTTON TEXT CLASS CONSTANTS
+##################################################################################
+# Standard text for the buttons of the text viewer.
+##################################################################################
+class ViewerButtonText:
+    Previous = "Prev"
+    Next     = "Next"
+    Back     = "Back"
+
+
 ##################################################################################
 # ATTRIBUTES CLASS CONSTANTS
 ##################################################################################
@@ -279,11 +302,13 @@ class ButtonTuple:
 # Changeable Parameters.  Should be good but can be changed if needed
 ##################################################################################
 class Times:
-    SleepLoop    = 0.05
-    SleepShort   = 0.25
-    SleepLong    = 1
-    SwitchBounce = 400
-    RightClick   = 0.750
+    SleepLoop     = 0.05
+    SleepLoopDark = 0.25
+    SleepShort    = 0.25
+    SleepLong     = 1
+    SwitchBounce  = 400
+    RightClick    = 0.750
+    WakeMargin    = 0.01
 
 
 ##################################################################################
@@ -405,6 +430,18 @@ class DisplayHeaderRefresh:
     All       = 5
 
 
+##################################################################################
+# LOOP MODE CLASS CONSTANTS
+##################################################################################
+# How the main loop waits between passes.  Poll sleeps for Times.SleepLoop and
+# checks for events, Event blocks until there is something to do (see
+# EventLoop).
+##################################################################################
+class LoopMode:
+    Poll  = 0
+    Event = 1
+
+
 ##################################################################################
 # SPLASH BUILT-INs
 ##################################################################################
@@ -569,6 +606,7 @@ class Defaults:
     DEFAULT_BUTTON_FONT_SIZE = 20
     DEFAULT_BUTTON_FONT_ALIGN = TextHAlign.Center
     DEFAULT_BUTTON_FONT_VALIGN = TextVAlign.Middle
+    DEFAULT_MIN_FONT_SIZE = 8
     DEFAULT_TFT_TYPE = None
 
     ##################################################################################
@@ -585,6 +623,7 @@ class Defaults:
     DEFAULT_DIALOG_BORDER_WIDTH_320x240 = 4
     DEFAULT_DIALOG_FONT_H_PADDING_320x240 = 6
     DEFAULT_DIALOG_FONT_V_PADDING_320x240 = 8
+    DEFAULT_DIALOG_MODAL_MARGIN_320x240 = 16
     DEFAULT_HEADFOOT_FONT_H_PADDING_320x240 = 6
     DEFAULT_HEADFOOT_FONT_V_PADDING_320x240 = 8
     DEFAULT_BUTTON_FONT_H_PADDING_320x240 = 2
@@ -610,6 +649,7 @@ class Defaults:
     DEFAULT_DIALOG_BORDER_WIDTH_480x320 = 6
     DEFAULT_DIALOG_FONT_H_PADDING_480x320 = 6
     DEFAULT_DIALOG_FONT_V_PADDING_480x320 = 6
+    DEFAULT_DIALOG_MODAL_MARGIN_480x320 = 24
     DEFAULT_HEADFOOT_FONT_H_PADDDING_480x320 = 6
     DEFAULT_HEADFOOT_FONT_V_PADDING_480x320 = 6
     DEFAULT_BUTTON_FONT_H_PADDING_480x320 = 3
@@ -669,6 +709,7 @@ class Defaults:
     default_dialog_border_width       = DEFAULT_DIALOG_BORDER_WIDTH_320x240
     default_dialog_font_h_padding     = DEFAULT_DIALOG_FONT_H_PADDING_320x240
     default_dialog_font_v_padding     = DEFAULT_DIALOG_FONT_V_PADDING_320x240
+    default_dialog_modal_margin       = DEFAULT_DIALOG_MODAL_MARGIN_320x240
     default_headfoot_font_h_padding     = DEFAULT_HEADFOOT_FONT_H_PADDING_320x240
     default_headfoot_font_v_padding     = DEFAULT_HEADFOOT_FONT_V_PADDING_320x240
     default_button_font_h_padding     = DEFAULT_BUTTON_FONT_H_PADDING_320x240
@@ -697,6 +738,7 @@ class Defaults:
             cls.default_dialog_border_width       = Defaults.DEFAULT_DIALOG_BORDER_WIDTH_480x320
             cls.default_dialog_font_h_padding     = Defaults.DEFAULT_DIALOG_FONT_H_PADDING_480x320
             cls.default_dialog_font_v_padding     = Defaults.DEFAULT_DIALOG_FONT_V_PADDING_480x320
+            cls.default_dialog_modal_margin       = Defaults.DEFAULT_DIALOG_MODAL_MARGIN_480x320
             cls.default_headfoot_font_h_padding     = Defaults.DEFAULT_HEADFOOT_FONT_H_PADDDING_480x320
             cls.default_headfoot_font_v_padding     = Defaults.DEFAULT_HEADFOOT_FONT_V_PADDING_480x320
             cls.default_button_font_h_padding     = Defaults.DEFAULT_BUTTON_FONT_H_PADDING_480x320
@@ -765,6 +807,543 @@ class Defaults:
             cls.default_button_v_align = global_font_v_align
 
 
+##################################################################################
+# FONT CACHE CLASS
+##################################################################################
+# Process-wide cache of pygame.freetype.Font objects.  Opening a font re-reads and
+# re-parses the font file, so fonts are created once and shared by every line that
+# uses the same path, size, style and font resolution.  The least recently used
+# font is dropped once the cache holds more than max_size fonts.  The hits and
+# misses counters can be used to check how well the cache is working.  The lock
+# is held while a font is loaded or used to render, so fonts can be preloaded on
+# another thread.
+##################################################################################
+class FontCache:
+    max_size = 32
+    hits     = 0
+    misses   = 0
+    fonts    = OrderedDict()
+    lock     = threading.RLock()
+
+    ##################################################################################
+    # FONT CACHE GET_FONT METHOD
+    ##################################################################################
+    # Returns the cached font for the font (path, None for the default font or an
+    # existing pygame.freetype.Font), size and style passed in.  The font is created
+    # and added to the cache if it has not been used before.
+    ##################################################################################
+    @classmethod
+    def get_font(cls, font, size, style=None):
+        if isinstance(font, pygame.freetype.Font):
+            path = font.path
+        else:
+            path = font
+        key = (path, size, style, Defaults.default_font_resolution)
+        with cls.lock:
+            cached_font = cls.fonts.pop(key, None)
+            if cached_font is not None:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+                logger.debug("Font cache miss.  Path: {0}, Size: {1}, Style: {2}, Resolution: {3}".format(*key))
+                cached_font = pygame.freetype.Font(path, size, resolution=Defaults.default_font_resolution)
+                if style is not None:
+                    cached_font.style = style
+                while len(cls.fonts) >= cls.max_size > 0:
+                    cls.fonts.popitem(last=False)
+            cls.fonts[key] = cached_font
+        return cached_font
+
+    ##################################################################################
+    # FONT CACHE CLEAR METHOD
+    ##################################################################################
+    # Removes all fonts from the cache and resets the hit and miss counters.
+    ##################################################################################
+    @classmethod
+    def clear(cls):
+        cls.fonts.clear()
+        cls.hits = 0
+        cls.misses = 0
+        FontMetrics.clear()
+        GlyphAtlas.clear()
+
+
+##################################################################################
+# FONT METRICS CLASS
+##################################################################################
+# Class that keeps a table of the metrics of each glyph (bearing, extent, ascent,
+# descent and advance) of a font, built from pygame.freetype.Font.get_metrics, so
+# the width of a text can be added up from the table without laying out or
+# rasterizing the text.  The printable ASCII glyphs are loaded when the table is
+# created and any other glyph (like the degree sign) is added the first time it
+# is measured.  Tables are kept per font path, size and resolution for as many
+# fonts as the FontCache holds.  pygame.freetype does not expose kerning pairs,
+# so texts are measured by the font itself when kerning (or a style, rotation or
+# vertical layout that changes the glyph metrics) is on, or when a glyph is
+# missing from the font.
+##################################################################################
+class FontMetrics:
+    tables    = OrderedDict()
+    max_spans = 1024
+    preload   = u"".join(unichr(code) for code in range(32, 127))
+
+    ##################################################################################
+    # FONT METRICS INIT METHOD
+    ##################################################################################
+    def __init__(self, font):
+        self.font = font
+        self.glyphs = {}
+        self.ascender = font.get_sized_ascender()
+        self.descender = font.get_sized_descender()
+        self.height = font.get_sized_height()
+        self.line_heights = {}
+        self.spans = {}
+        self.add_glyphs(FontMetrics.preload)
+
+    ##################################################################################
+    # FONT METRICS GET_METRICS METHOD
+    ##################################################################################
+    # Returns the metrics table of the font passed in, or None if the table can't
+    # measure the font exactly.  The table is created if it has not been used before.
+    ##################################################################################
+    @classmethod
+    def get_metrics(cls, font):
+        if font.kerning or font.vertical or font.rotation or font.style != pygame.freetype.STYLE_NORMAL:
+            return None
+        key = (font.path, font.size, font.resolution)
+        with FontCache.lock:
+            metrics = cls.tables.pop(key, None)
+            if metrics is None:
+                metrics = FontMetrics(font)
+                while len(cls.tables) >= FontCache.max_size > 0:
+                    cls.tables.popitem(last=False)
+            metrics.font = font
+            cls.tables[key] = metrics
+        return metrics
+
+    ##################################################################################
+    # FONT METRICS CLEAR METHOD
+    ##################################################################################
+    # Removes all metrics tables.
+    ##################################################################################
+    @classmethod
+    def clear(cls):
+        cls.tables.clear()
+
+    ##################################################################################
+    # FONT METRICS ADD_GLYPHS METHOD
+    ##################################################################################
+    # Adds the metrics of any characters of the text that are not in the table yet.
+    # Each glyph is kept as a tuple of min x, max x, min y, max y and advance, or
+    # None if the font has no glyph for the character.
+    ##################################################################################
+    def add_glyphs(self, text):
+        missing = remove_duplicates([character for character in text if character not in self.glyphs])
+        if not missing:
+            return
+        for character, glyph in zip(missing, self.font.get_metrics(u"".join(missing) if isinstance(text, unicode)
+                                                                   else "".join(missing))):
+            if glyph is not None:
+                # The minimums are returned as unsigned 32-bit values.
+                min_x, max_x, min_y, max_y, advance = glyph[0], glyph[1], glyph[2], glyph[3], glyph[4]
+                if min_x > 0x7FFFFFFF:
+                    min_x -= 0x100000000
+                if min_y > 0x7FFFFFFF:
+                    min_y -= 0x100000000
+                glyph = (min_x, max_x, min_y, max_y, advance)
+            self.glyphs[character] = glyph
+
+    ##################################################################################
+    # FONT METRICS GET_SPAN METHOD
+    ##################################################################################
+    # Returns a tuple of the left and right edges of the ink and the advance of the
+    # text when it is laid out starting at 0, or None if a glyph is missing or the
+    # text is empty.  The text is measured a word (with the space before it) at a
+    # time, since the same words come up again and again.
+    ##################################################################################
+    def get_span(self, text):
+        words = text.split(" ")
+        span = None
+        for index, word in enumerate(words):
+            if index > 0:
+                word = " " + word
+            elif not word:
+                continue
+            word_span = self.get_word_span(word)
+            if word_span is None:
+                return None
+            if span is None:
+                span = word_span
+            else:
+                left, right, pen = span
+                span = (min(left, pen + word_span[0]), max(right, pen + word_span[1]), pen + word_span[2])
+        return span
+
+    ##################################################################################
+    # FONT METRICS GET_WORD_SPAN METHOD
+    ##################################################################################
+    # Returns the span (see get_span) of a word from the glyph metrics.  A glyph with
+    # no ink (like a space) takes up its advance.  The spans of up to max_spans words
+    # are kept.
+    ##################################################################################
+    def get_word_span(self, word):
+        span = self.spans.get(word, False)
+        if span is not False:
+            return span
+        self.add_glyphs(word)
+        glyphs = self.glyphs
+        pen = 0.0
+        left = right = None
+        for character in word:
+            glyph = glyphs[character]
+            if glyph is None:
+                pen = None
+                break
+            if glyph[1] > glyph[0]:
+                glyph_left, glyph_right = pen + glyph[0], pen + glyph[1]
+            else:
+                glyph_left, glyph_right = pen, pen + glyph[4]
+            if left is None or glyph_left < left:
+                left = glyph_left
+            if right is None or glyph_right > right:
+                right = glyph_right
+            pen += glyph[4]
+        span = (left, right, pen) if pen is not None and left is not None else None
+        if len(self.spans) >= FontMetrics.max_spans:
+            self.spans.clear()
+        self.spans[word] = span
+        return span
+
+    ##################################################################################
+    # FONT METRICS GET_EXTENT METHOD
+    ##################################################################################
+    # Returns a tuple of the left and right edges and the top and bottom of the ink
+    # of the text when it is laid out starting at 0, or None if a glyph is missing.
+    ##################################################################################
+    def get_extent(self, text):
+        span = self.get_span(text)
+        if span is None:
+            return None
+        left, right, pen = span
+        top = bottom = None
+        glyphs = self.glyphs
+        for character in set(text):
+            glyph = glyphs[character]
+            # A glyph with no ink sits on the baseline.
+            if glyph[1] > glyph[0]:
+                glyph_top, glyph_bottom = glyph[3], glyph[2]
+            else:
+                glyph_top = glyph_bottom = 0
+            if top is None or glyph_top > top:
+                top = glyph_top
+            if bottom is None or glyph_bottom < bottom:
+                bottom = glyph_bottom
+        return left, right, top, bottom
+
+    ##################################################################################
+    # FONT METRICS GET_WIDTH METHOD
+    ##################################################################################
+    # Returns the width of the rect the font would return for the text.
+    ##################################################################################
+    def get_width(self, text):
+        span = self.get_span(text)
+        if span is None:
+            return self.font.get_rect(text).width
+        return self.get_span_width(span)
+
+    ##################################################################################
+    # FONT METRICS GET_SPAN_WIDTH METHOD
+    ##################################################################################
+    # Returns the width of the rect the font would return for a text with the span
+    # passed in.  Padded text takes up at least its advance from 0.
+    ##################################################################################
+    def get_span_width(self, span):
+        left, right, pen = span
+        if self.font.pad:
+            if left > 0:
+                left = 0
+            if right < pen:
+                right = pen
+        return int(math.ceil(right) - math.floor(left))
+
+    ##################################################################################
+    # FONT METRICS GET_RECT METHOD
+    ##################################################################################
+    # Returns the rect the font would return for the text.  Padded text takes up at
+    # least its advance from 0 and the ascender to the row below the descender of
+    # the font.
+    ##################################################################################
+    def get_rect(self, text):
+        extent = self.get_extent(text) if text else None
+        if extent is None:
+            return self.font.get_rect(text)
+        left, right, top, bottom = extent
+        if self.font.pad:
+            span = self.get_span(text)
+            left = min(left, 0)
+            right = max(right, span[2])
+            top = max(top, self.ascender)
+            bottom = min(bottom, self.descender - 1)
+        left = int(math.floor(left))
+        return pygame.Rect(left, top, int(math.ceil(right)) - left, top - bottom)
+
+    ##################################################################################
+    # FONT METRICS GET_LINE_HEIGHT METHOD
+    ##################################################################################
+    # Returns the height of a wrapped line of text, which is the height of a few
+    # random words and symbols that have ascenders and descenders.  The height is
+    # kept for padded and unpadded text.
+    ##################################################################################
+    def get_line_height(self):
+        line_height = self.line_heights.get(self.font.pad)
+        if line_height is None:
+            line_height = self.get_rect("jet Mopping quiT!([}|/").height
+            self.line_heights[self.font.pad] = line_height
+        return line_height
+
+    ##################################################################################
+    # FONT METRICS GET_RULER METHOD
+    ##################################################################################
+    # Returns a TextRuler for measuring text from the start offset passed in.
+    ##################################################################################
+    def get_ruler(self, text, start):
+        return TextRuler(self, text, start)
+
+
+##################################################################################
+# TEXT RULER CLASS
+##################################################################################
+# Class that measures the width of a text from a fixed start to an end that only
+# moves forward.  The span of the text added since the last measurement (usually
+# a space and a word) is joined to the span measured so far, so measuring every
+# word end of a line takes as long as measuring the line.  Texts the metrics
+# table can't measure are measured by the font.
+##################################################################################
+class TextRuler(object):
+
+    ##################################################################################
+    # TEXT RULER INIT METHOD
+    ##################################################################################
+    def __init__(self, metrics, text, start):
+        self.metrics = metrics
+        self.text = text
+        self.start = start
+        self.end = start
+        self.span = None
+        self.exact = True
+
+    ##################################################################################
+    # TEXT RULER GET_WIDTH METHOD
+    ##################################################################################
+    # Returns the width of the rect the font would return for the text from the
+    # start to the end offset passed in.
+    ##################################################################################
+    def get_width(self, end):
+        if self.exact and end > self.end:
+            added = self.text[self.end:end]
+            if " " in added[1:]:
+                added = self.metrics.get_span(added)
+            else:
+                added = self.metrics.get_word_span(added)
+            if added is None:
+                self.exact = False
+            elif self.span is None:
+                self.span = added
+            else:
+                left, right, pen = self.span
+                self.span = (min(left, pen + added[0]), max(right, pen + added[1]), pen + added[2])
+            self.end = end
+        if not self.exact or end != self.end or self.span is None:
+            return self.metrics.font.get_rect(self.text[self.start:end]).width
+        return self.metrics.get_span_width(self.span)
+
+
+##################################################################################
+# GLYPH ATLAS CLASS
+##################################################################################
+# Class that keeps the glyphs of a small character set (digits, separators, signs
+# and units) of a font pre-rendered in one color, side by side in a single atlas
+# surface, so text that changes often (like clocks and sensor readings) can be
+# drawn by copying one cell per character instead of having the font lay out
+# and rasterize it.  Once warmed up, text is measured from the FontMetrics table
+# and drawn without any calls to the font, and the surface is the same as the
+# one the font would render.  Only glyphs whose ink stays inside their advance
+# get a cell, so cells never overlap, and text with any other character is left
+# to the font.  Atlases are kept per font and color for up to max_size of them
+# and their surfaces count against the SurfaceCache budget.
+##################################################################################
+class GlyphAtlas:
+    charset  = u"0123456789:;.,+-/%# \xb0CFKVWAPMapm"
+    max_size = 16
+    hits     = 0
+    misses   = 0
+    atlases  = OrderedDict()
+
+    ##################################################################################
+    # GLYPH ATLAS INIT METHOD
+    ##################################################################################
+    # Renders the cells of the character set that the font has into the atlas.
+    ##################################################################################
+    def __init__(self, metrics, color):
+        self.metrics = metrics
+        self.color = color
+        self.cells = {}
+        font = metrics.font
+        metrics.add_glyphs(GlyphAtlas.charset)
+        atlas_width = 0
+        self.top = metrics.ascender
+        bottom = metrics.descender
+        for character in GlyphAtlas.charset:
+            glyph = metrics.glyphs[character]
+            if glyph is None or glyph[0] < 0 or glyph[1] > glyph[4] or glyph[4] != int(glyph[4]):
+                continue
+            self.cells[character] = (atlas_width, int(glyph[4]))
+            atlas_width += int(glyph[4])
+            if glyph[1] > glyph[0]:
+                self.top = max(self.top, glyph[3])
+                bottom = min(bottom, glyph[2])
+        self.height = self.top - bottom + 1
+        self.surface = Surfaces.create((max(atlas_width, 1), self.height), True)
+        self.surface.fill((0, 0, 0, 0))
+        pad = font.pad
+        font.pad = False
+        for character, (cell_x, cell_width) in self.cells.items():
+            glyph = metrics.glyphs[character]
+            if glyph[1] > glyph[0]:
+                glyph_surface, glyph_rect = font.render(character, fgcolor=color)
+                Surfaces.blit(self.surface, Surfaces.convert(glyph_surface),
+                              (cell_x + glyph_rect.x, self.top - glyph_rect.y), special_flags=pygame.BLEND_RGBA_ADD)
+        font.pad = pad
+
+    ##################################################################################
+    # GLYPH ATLAS GET_ATLAS METHOD
+    ##################################################################################
+    # Returns the atlas of the font and color passed in, or None if the font can't
+    # be measured from a FontMetrics table.  The atlas is created if it has not been
+    # used before.
+    ##################################################################################
+    @classmethod
+    def get_atlas(cls, font, color):
+        metrics = FontMetrics.get_metrics(font)
+        if metrics is None or color is None:
+            return None
+        key = (font.path, font.size, font.resolution, tuple(color), Surfaces.alpha_format)
+        atlas = cls.atlases.pop(key, None)
+        if atlas is not None:
+            cls.hits += 1
+            SurfaceCache.touch(SurfaceCacheName.Glyphs, atlas)
+        else:
+            cls.misses += 1
+            logger.debug("Glyph atlas miss.  Path: {0}, Size: {1}, Resolution: {2}, Color: {3}".format(*key))
+            atlas = GlyphAtlas(metrics, color)
+            while len(cls.atlases) >= cls.max_size > 0:
+                SurfaceCache.release(SurfaceCacheName.Glyphs, cls.atlases.popitem(last=False)[1])
+            SurfaceCache.track(SurfaceCacheName.Glyphs, atlas, [atlas.surface], cls.discard)
+        atlas.metrics = metrics
+        cls.atlases[key] = atlas
+        return atlas
+
+    ##################################################################################
+    # GLYPH ATLAS CLEAR METHOD
+    ##################################################################################
+    # Removes all atlases and resets the hit and miss counters.
+    ##################################################################################
+    @classmethod
+    def clear(cls):
+        for atlas in cls.atlases.values():
+            SurfaceCache.release(SurfaceCacheName.Glyphs, atlas)
+        cls.atlases.clear()
+        cls.hits = 0
+        cls.misses = 0
+
+    ##################################################################################
+    # GLYPH ATLAS DISCARD METHOD
+    ##################################################################################
+    # Removes the atlas passed in from the cache.  Called by the SurfaceCache when
+    # it releases the atlas.
+    ##################################################################################
+    @classmethod
+    def discard(cls, atlas):
+        for key, cached_atlas in cls.atlases.items():
+            if cached_atlas is atlas:
+                del cls.atlases[key]
+
+    ##################################################################################
+    # GLYPH ATLAS CAN_RENDER METHOD
+    ##################################################################################
+    # Returns True if every character of the text has a cell in the atlas.
+    ##################################################################################
+    def can_render(self, text):
+        if not text:
+            return False
+        cells = self.cells
+        for character in text:
+            if character not in cells:
+                return False
+        return True
+
+    ##################################################################################
+    # GLYPH ATLAS GET_CHANGED_RECTS METHOD
+    ##################################################################################
+    # Returns the rects (inside the rect of the text) of the cells that differ
+    # between the last text and the text passed in, or None if the two can't be
+    # swapped cell for cell because they have different rects, a changed character
+    # has a different width than the one it replaces (which would move the cells
+    # after it) or the atlas can't render them both.
+    ##################################################################################
+    def get_changed_rects(self, last_text, text):
+        if last_text is None or len(last_text) != len(text) or not self.can_render(text) or \
+                not self.can_render(last_text):
+            return None
+        text_rect = self.metrics.get_rect(text)
+        if text_rect != self.metrics.get_rect(last_text):
+            return None
+        text_area = pygame.Rect(0, 0, text_rect.width, text_rect.height)
+        changed_rects = []
+        cell_left = -text_rect.x
+        for index, character in enumerate(text):
+            cell_width = self.cells[character][1]
+            if character != last_text[index]:
+                if self.cells[last_text[index]][1] != cell_width:
+                    return None
+                changed_rect = text_area.clip((cell_left, 0, cell_width, text_rect.height))
+                if changed_rect.width > 0:
+                    changed_rects.append(changed_rect)
+            cell_left += cell_width
+        return changed_rects
+
+    ##################################################################################
+    # GLYPH ATLAS RENDER METHOD
+    ##################################################################################
+    # Returns a surface and rect of the text like pygame.freetype.Font.render, or
+    # None if a character of the text has no cell.  If the surface and text of the
+    # last render are passed in, the surface is updated in place by copying only
+    # the cells that changed, as long as the text still has the same rect.
+    ##################################################################################
+    def render(self, text, last_surface=None, last_text=None):
+        if not self.can_render(text):
+            return None
+        text_rect = self.metrics.get_rect(text)
+        if last_surface is None or last_surface.get_size() != text_rect.size or \
+                self.get_changed_rects(last_text, text) is None:
+            last_surface = Surfaces.create(text_rect.size, True)
+            last_surface.fill((0, 0, 0, 0))
+            last_text = None
+        atlas_top = self.top - text_rect.y
+        cell_left = -text_rect.x
+        for index, character in enumerate(text):
+            cell_x, cell_width = self.cells[character]
+            if last_text is None or last_text[index] != character:
+                cell_rect = pygame.Rect(cell_left, 0, cell_width, text_rect.height)
+                if last_text is not None:
+                    last_surface.fill((0, 0, 0, 0), cell_rect)
+                # Adding to the cleared cell copies the pixels and their alpha as is.
+                Surfaces.blit(last_surface, self.surface, cell_rect,
+                              pygame.Rect(cell_x, atlas_top, cell_width, text_rect.height), pygame.BLEND_RGBA_ADD)
+            cell_left += cell_width
+        return last_surface, text_rect
+
+
 ##################################################################################
 # GET_PACKAGE_VERSION
 ##################################################################################
@@ -890,21 +1469,596 @@ def draw_true_with_rect(screen, color, rect, border_width):
 # DRAW_TRUE_RECT METHOD
 ##################################################################################
 # Method that draws a rectangle with 'square' borders for more crisp buttons and
-# borders using the rectangle parameters as input.
+# borders using the rectangle parameters as input.  The border is drawn with at
+# most four fills and the changed rectangle is returned.
 ##################################################################################
 def draw_true_rect(screen, color, x, y, width, height, border_width):
     if border_width == 0:
         return pygame.draw.rect(screen, color, (x, y, width, height), border_width)
-    rect = pygame.draw.rect(screen, color, (x, y, width, height), 1)
-    border_count = 1
-    while border_count < border_width:
-        x += 1
-        y += 1
-        width -= 2
-        height -= 2
-        pygame.draw.rect(screen, color, (x, y, width, height), 1)
-        border_count += 1
-    return rect
+    return draw_frame(screen, color, x, y, width, height, border_width)
+
+
+##################################################################################
+# COMPOSITOR CLASS
+##################################################################################
+# Class that collects the dirty rectangles drawn during a frame and pushes only
+# those regions to the display.  Overlapping rectangles are merged before the
+# update and a full flip is done instead when the dirty area reaches the
+# full_flip_ratio of the screen (or the whole screen was marked dirty).  The
+# number of rectangles and pixels pushed in the last frame and in total are
+# kept for checking how much is sent to the display.  While suspended (the
+# screen is dark), nothing is pushed and the dirty regions are kept until it is
+# resumed.
+##################################################################################
+class Compositor:
+    full_flip_ratio = 0.6
+    dirty_rects     = []
+    dirty_full      = False
+    suspended       = False
+    skipped         = 0
+    frame_rects     = 0
+    frame_pixels    = 0
+    total_frames    = 0
+    total_flips     = 0
+    total_rects     = 0
+    total_pixels    = 0
+
+    ##################################################################################
+    # COMPOSITOR ADD METHOD
+    ##################################################################################
+    # Marks a rectangle, or list or tuple of rectangles, as dirty.  A rectangle is a
+    # pygame.Rect or a tuple of four numbers.  Anything else (such as None or True
+    # returned from a draw method) is ignored.
+    ##################################################################################
+    @classmethod
+    def add(cls, rects):
+        if rects is None or cls.dirty_full:
+            return
+        if cls.is_rect(rects):
+            rects = [rects]
+        elif not isinstance(rects, (list, tuple)):
+            logger.debug("Ignored dirty rectangle that is not a rectangle.  Value: {0!r}".format(rects))
+            return
+        screen_rect = pygame.Rect(0, 0, Defaults.tft_width, Defaults.tft_height)
+        for rect in rects:
+            if rect is None:
+                continue
+            if not cls.is_rect(rect):
+                logger.debug("Ignored dirty rectangle that is not a rectangle.  Value: {0!r}".format(rect))
+                continue
+            rect = screen_rect.clip(pygame.Rect(rect))
+            if rect.width > 0 and rect.height > 0:
+                cls.dirty_rects.append(rect)
+
+    ##################################################################################
+    # COMPOSITOR IS_RECT METHOD
+    ##################################################################################
+    # Returns True if the value is a pygame.Rect or a tuple of four numbers.
+    ##################################################################################
+    @staticmethod
+    def is_rect(value):
+        if isinstance(value, pygame.Rect):
+            return True
+        return isinstance(value, tuple) and len(value) == 4 and \
+            all(isinstance(item, (int, long, float)) and not isinstance(item, bool) for item in value)
+
+    ##################################################################################
+    # COMPOSITOR ADD_FULL METHOD
+    ##################################################################################
+    # Marks the whole screen as dirty so the next present does a full flip.
+    ##################################################################################
+    @classmethod
+    def add_full(cls):
+        cls.dirty_full = True
+        cls.dirty_rects = []
+
+    ##################################################################################
+    # COMPOSITOR MERGE_RECTS METHOD
+    ##################################################################################
+    # Returns a list of rectangles where any overlapping rectangles from the list
+    # passed in have been combined into one.
+    ##################################################################################
+    @staticmethod
+    def merge_rects(rects):
+        merged = []
+        for rect in rects:
+            rect = pygame.Rect(rect)
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    ##################################################################################
+    # COMPOSITOR PRESENT METHOD
+    ##################################################################################
+    # Pushes the dirty regions of the frame to the display and resets them.  Returns
+    # the number of pixels pushed.
+    ##################################################################################
+    @classmethod
+    def present(cls):
+        if not cls.dirty_full and not cls.dirty_rects:
+            return 0
+        if cls.suspended:
+            cls.dirty_rects = cls.merge_rects(cls.dirty_rects)
+            cls.skipped += 1
+            return 0
+        screen_pixels = Defaults.tft_width * Defaults.tft_height
+        rects = [] if cls.dirty_full else cls.merge_rects(cls.dirty_rects)
+        pixels = sum([rect.width * rect.height for rect in rects])
+        if cls.dirty_full or pixels >= screen_pixels * cls.full_flip_ratio:
+            pygame.display.flip()
+            cls.frame_rects = 1
+            cls.frame_pixels = screen_pixels
+            cls.total_flips += 1
+        else:
+            pygame.display.update(rects)
+            cls.frame_rects = len(rects)
+            cls.frame_pixels = pixels
+        cls.total_frames += 1
+        cls.total_rects += cls.frame_rects
+        cls.total_pixels += cls.frame_pixels
+        cls.dirty_rects = []
+        cls.dirty_full = False
+        return cls.frame_pixels
+
+    ##################################################################################
+    # COMPOSITOR SUSPEND METHOD
+    ##################################################################################
+    # Stops pushing frames to the display until resume is called.
+    ##################################################################################
+    @classmethod
+    def suspend(cls):
+        cls.suspended = True
+
+    ##################################################################################
+    # COMPOSITOR RESUME METHOD
+    ##################################################################################
+    # Pushes everything drawn while suspended in a single present and returns the
+    # number of pixels pushed.
+    ##################################################################################
+    @classmethod
+    def resume(cls):
+        cls.suspended = False
+        return cls.present()
+
+
+##################################################################################
+# EVENT LOOP CLASS
+##################################################################################
+# Class that makes the main loop wait for its next event.  In LoopMode.Poll the
+# loop sleeps for Times.SleepLoop and then takes whatever events have arrived.
+# In LoopMode.Event it blocks until a pygame event arrives, the timeout passed in
+# (the next deadline of the loop) is reached or another thread wakes it, so an
+# idle loop does not wake up at all and a tap is handled as soon as it arrives.
+# Other threads (GPIO callbacks, the touchscreen reader, etc.) pass work to the
+# loop with post, which runs it on the loop's thread, or just wake it with wake.
+# The wakeups counter is the number of waits, so the two modes can be compared
+# (see tftbenchmark.py).
+##################################################################################
+class EventLoop:
+    mode        = LoopMode.Poll
+    wake_type   = pygame.USEREVENT
+    tasks       = []
+    lock        = threading.Lock()
+    wake_posted = False
+    wakeups     = 0
+    tasks_run   = 0
+    signal_pipe = None
+
+    ##################################################################################
+    # EVENT LOOP IS_EVENT_MODE METHOD
+    ##################################################################################
+    # Returns True if the loop blocks waiting for events.
+    ##################################################################################
+    @classmethod
+    def is_event_mode(cls):
+        return cls.mode == LoopMode.Event
+
+    ##################################################################################
+    # EVENT LOOP WATCH_SIGNALS METHOD
+    ##################################################################################
+    # Makes signals (like shutdown) wake the loop.  The Python signal handlers only
+    # run once the loop is back from waiting, so each signal writes a byte to a pipe
+    # (see signal.set_wakeup_fd) that a thread reads to wake the loop.  Must be
+    # called from the main thread.
+    ##################################################################################
+    @classmethod
+    def watch_signals(cls):
+        if cls.signal_pipe is not None:
+            return
+        cls.signal_pipe = os.pipe()
+        fcntl.fcntl(cls.signal_pipe[1], fcntl.F_SETFL, fcntl.fcntl(cls.signal_pipe[1], fcntl.F_GETFL) | os.O_NONBLOCK)
+        signal.set_wakeup_fd(cls.signal_pipe[1])
+        signal_thread = threading.Thread(target=cls.read_signals, name="EventLoopSignals")
+        signal_thread.daemon = True
+        signal_thread.start()
+
+    ##################################################################################
+    # EVENT LOOP READ_SIGNALS METHOD
+    ##################################################################################
+    # Wakes the loop each time a signal is written to the signal pipe.  Runs on its
+    # own thread.
+    ##################################################################################
+    @classmethod
+    def read_signals(cls):
+        while os.read(cls.signal_pipe[0], 64):
+            cls.wake()
+
+    ##################################################################################
+    # EVENT LOOP POST METHOD
+    ##################################################################################
+    # Queues the function (called with the arguments passed in) to be run by the
+    # loop and wakes the loop.  In LoopMode.Poll the function is called right away.
+    ##################################################################################
+    @classmethod
+    def post(cls, function, *args):
+        if not cls.is_event_mode():
+            function(*args)
+            return
+        with cls.lock:
+            cls.tasks.append((function, args))
+        cls.wake()
+
+    ##################################################################################
+    # EVENT LOOP WAKE METHOD
+    ##################################################################################
+    # Wakes the loop if it is waiting, by posting a wake event.  Can be called from
+    # any thread.  Only one wake event is queued at a time: wake_posted is set while
+    # one is in the queue and is only cleared (under the lock) by wait as it takes
+    # the events from the queue, so a wake is never dropped.
+    ##################################################################################
+    @classmethod
+    def wake(cls):
+        if not cls.is_event_mode():
+            return
+        with cls.lock:
+            if cls.wake_posted:
+                return
+            try:
+                pygame.event.post(pygame.event.Event(cls.wake_type))
+                cls.wake_posted = True
+            except pygame.error, ex:
+                logger.debug("Unable to wake the event loop.  {0}".format(ex))
+
+    ##################################################################################
+    # EVENT LOOP RUN_TASKS METHOD
+    ##################################################################################
+    # Runs the functions posted to the loop, in the order they were posted.
+    ##################################################################################
+    @classmethod
+    def run_tasks(cls):
+        with cls.lock:
+            tasks = cls.tasks
+            cls.tasks = []
+        for function, args in tasks:
+            function(*args)
+            cls.tasks_run += 1
+
+    ##################################################################################
+    # EVENT LOOP WAIT METHOD
+    ##################################################################################
+    # Waits for the next events and returns them, without the wake events.  The
+    # timeout is the number of seconds until the loop has something to do on its
+    # own (0 to not wait, None for nothing).  It is only used in LoopMode.Event.
+    # LoopMode.Poll sleeps for the poll time passed in (Times.SleepLoop if None).
+    ##################################################################################
+    @classmethod
+    def wait(cls, timeout=None, poll_time=None):
+        cls.wakeups += 1
+        if not cls.is_event_mode():
+            time.sleep(poll_time if poll_time is not None else Times.SleepLoop)
+            return pygame.event.get()
+        events = cls.get_events()
+        if not events and not cls.tasks and (timeout is None or timeout > 0):
+            events = cls.wait_event(timeout) + cls.get_events()
+        return [event for event in events if event.type != cls.wake_type]
+
+    ##################################################################################
+    # EVENT LOOP GET_EVENTS METHOD
+    ##################################################################################
+    # Takes all the events from the queue.  Done under the lock along with clearing
+    # wake_posted, as any wake event queued is taken with them.
+    ##################################################################################
+    @classmethod
+    def get_events(cls):
+        with cls.lock:
+            cls.wake_posted = False
+            return pygame.event.get()
+
+    ##################################################################################
+    # EVENT LOOP WAIT_EVENT METHOD
+    ##################################################################################
+    # Blocks until there is an event or the timeout (in seconds, None for no limit)
+    # is reached and returns the event that ended the wait, if any (wait then takes
+    # the rest of the queue with get_events).  pygame 1 can't wait with a timeout,
+    # so a timer thread wakes the loop instead.
+    ##################################################################################
+    @classmethod
+    def wait_event(cls, timeout):
+        if timeout is not None and pygame.version.vernum[0] >= 2:
+            event = pygame.event.wait(int(math.ceil(timeout * 1000)))
+            return [event] if event.type != pygame.NOEVENT else []
+        waker = None
+        if timeout is not None:
+            waker = threading.Timer(timeout, cls.wake)
+            waker.daemon = True
+            waker.start()
+        try:
+            return [pygame.event.wait()]
+        finally:
+            if waker is not None:
+                waker.cancel()
+
+
+##################################################################################
+# MONOTONIC CLOCK CONSTANTS
+##################################################################################
+# Clock id of the Linux monotonic clock for clock_gettime.
+##################################################################################
+CLOCK_MONOTONIC = 1
+
+
+##################################################################################
+# TIMESPEC CLASS
+##################################################################################
+# The timespec structure filled in by clock_gettime.
+##################################################################################
+class Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+##################################################################################
+# GET_MONOTONIC_CLOCK METHOD
+##################################################################################
+# Returns a function that returns the seconds (as a float) of a clock that is not
+# changed when the system time is set, for measuring timeouts.  Python 2 has no
+# time.monotonic, so clock_gettime is called from the C library.  time.time is
+# returned if neither is available.
+##################################################################################
+def get_monotonic_clock():
+    if hasattr(time, "monotonic"):
+        return time.monotonic
+    try:
+        library = ctypes.CDLL(ctypes.util.find_library("rt") or ctypes.util.find_library("c"), use_errno=True)
+        clock_gettime = library.clock_gettime
+        clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(Timespec)]
+        timespec = Timespec()
+        if clock_gettime(CLOCK_MONOTONIC, ctypes.byref(timespec)) != 0:
+            raise OSError(ctypes.get_errno(), "clock_gettime failed")
+    except (OSError, AttributeError), ex:
+        logger.warning("Monotonic clock not available.  Using system time.  {0}".format(ex))
+        return time.time
+
+    def monotonic_clock():
+        clock_gettime(CLOCK_MONOTONIC, ctypes.byref(timespec))
+        return timespec.tv_sec + timespec.tv_nsec * 1e-9
+    return monotonic_clock
+
+monotonic = get_monotonic_clock()
+
+
+##################################################################################
+# TIMER ENTRY CLASS
+##################################################################################
+# A function to be called by Timers once its deadline (in monotonic() seconds) is
+# reached, along with the arguments to call it with.  An entry with an interval
+# is called again every interval seconds until it is cancelled.  The queued
+# attribute is the deadline and sequence number of its item in the Timers heap.
+##################################################################################
+class TimerEntry(object):
+    function = None
+    args = ()
+    interval = None
+    delay = None
+    deadline = None
+    queued = None
+    calls = 0
+
+    ##################################################################################
+    # TIMER ENTRY INIT METHOD
+    ##################################################################################
+    # Sets the function, its arguments and the repeat interval (None for once).
+    ##################################################################################
+    def __init__(self, function, args=(), interval=None):
+        self.function = function
+        self.args = args
+        self.interval = interval
+
+    ##################################################################################
+    # TIMER ENTRY IS_ACTIVE METHOD
+    ##################################################################################
+    # Returns True if the entry is waiting for its deadline.
+    ##################################################################################
+    def is_active(self):
+        return self.deadline is not None
+
+    ##################################################################################
+    # TIMER ENTRY GET_REMAINING METHOD
+    ##################################################################################
+    # Returns the number of seconds until the deadline (0 if it has passed) or None
+    # if the entry is not active.
+    ##################################################################################
+    def get_remaining(self):
+        deadline = self.deadline
+        if deadline is None:
+            return None
+        return max(deadline - monotonic(), 0)
+
+    ##################################################################################
+    # TIMER ENTRY RESET METHOD
+    ##################################################################################
+    # Moves the deadline to delay seconds from now (the last delay if None).
+    ##################################################################################
+    def reset(self, delay=None):
+        Timers.schedule(self, self.delay if delay is None else delay)
+
+    ##################################################################################
+    # TIMER ENTRY CANCEL METHOD
+    ##################################################################################
+    # Stops the entry from being called.
+    ##################################################################################
+    def cancel(self):
+        Timers.cancel(self)
+
+
+##################################################################################
+# TIMERS CLASS
+##################################################################################
+# Class that keeps any number of timers (see TimerEntry) on the monotonic clock,
+# so they are not moved by changes to the system time and can be set to fractions
+# of a second.  The deadlines are kept in a heap.  Moving a deadline later (like
+# resetting the screen timeout on every touch) only changes the entry and the
+# heap is fixed up when its old deadline comes up, so it costs no system calls.
+# Timers can be set from any thread, but their functions are only called by run,
+# which the main loop calls on each pass.  The main loop waits for events no
+# longer than get_remaining.
+##################################################################################
+class Timers:
+    entries  = []
+    lock     = threading.Lock()
+    sequence = 0
+    fired    = 0
+
+    ##################################################################################
+    # TIMERS ADD METHOD
+    ##################################################################################
+    # Calls the function with the arguments passed in after delay seconds and
+    # returns its TimerEntry.
+    ##################################################################################
+    @classmethod
+    def add(cls, delay, function, *args):
+        entry = TimerEntry(function, args)
+        cls.schedule(entry, delay)
+        return entry
+
+    ##################################################################################
+    # TIMERS ADD_REPEATING METHOD
+    ##################################################################################
+    # Calls the function with the arguments passed in every interval seconds and
+    # returns its TimerEntry.
+    ##################################################################################
+    @classmethod
+    def add_repeating(cls, interval, function, *args):
+        entry = TimerEntry(function, args, interval)
+        cls.schedule(entry, interval)
+        return entry
+
+    ##################################################################################
+    # TIMERS SCHEDULE METHOD
+    ##################################################################################
+    # Sets the deadline of the entry to delay seconds from now.  The entry is only
+    # added to the heap again if the deadline is earlier than the one it is queued
+    # for.  The loop is woken if the entry is now the first one due, as it may be
+    # waiting for a later deadline.
+    ##################################################################################
+    @classmethod
+    def schedule(cls, entry, delay):
+        deadline = monotonic() + delay
+        with cls.lock:
+            entry.delay = delay
+            wake = not cls.entries or deadline < cls.entries[0][0]
+            entry.deadline = deadline
+            if entry.queued is None or deadline < entry.queued[0]:
+                cls.push(entry)
+        if wake:
+            EventLoop.wake()
+
+    ##################################################################################
+    # TIMERS PUSH METHOD
+    ##################################################################################
+    # Adds the entry to the heap for its deadline.  Must be called with the lock.
+    ##################################################################################
+    @classmethod
+    def push(cls, entry):
+        cls.sequence += 1
+        entry.queued = (entry.deadline, cls.sequence)
+        heapq.heappush(cls.entries, (entry.deadline, cls.sequence, entry))
+
+    ##################################################################################
+    # TIMERS CANCEL METHOD
+    ##################################################################################
+    # Stops the entry from being called.  Its place in the heap is dropped when it
+    # comes up.
+    ##################################################################################
+    @classmethod
+    def cancel(cls, entry):
+        with cls.lock:
+            entry.deadline = None
+            entry.queued = None
+
+    ##################################################################################
+    # TIMERS GET_NEXT METHOD
+    ##################################################################################
+    # Returns the earliest deadline, or None if no timer is set.  Heap items of
+    # entries that were cancelled or queued again are dropped and those of entries
+    # whose deadline was moved later are put back in the heap for it.  Must be
+    # called with the lock.
+    ##################################################################################
+    @classmethod
+    def get_next(cls):
+        while cls.entries:
+            deadline, sequence, entry = cls.entries[0]
+            if entry.queued != (deadline, sequence):
+                heapq.heappop(cls.entries)
+            elif entry.deadline > deadline:
+                heapq.heappop(cls.entries)
+                cls.push(entry)
+            else:
+                return deadline
+        return None
+
+    ##################################################################################
+    # TIMERS GET_REMAINING METHOD
+    ##################################################################################
+    # Returns the number of seconds until the next timer is due (0 if one is due) or
+    # None if no timer is set.  Used by the main loop to know how long it can wait.
+    # Times.WakeMargin is added to a wait, so a loop that wakes a little early does
+    # not find the timer still pending and wait again for a few milliseconds.
+    ##################################################################################
+    @classmethod
+    def get_remaining(cls):
+        with cls.lock:
+            deadline = cls.get_next()
+        if deadline is None:
+            return None
+        remaining = deadline - monotonic()
+        return remaining + Times.WakeMargin if remaining > 0 else 0
+
+    ##################################################################################
+    # TIMERS RUN METHOD
+    ##################################################################################
+    # Calls the functions of the timers that are due in the order of their
+    # deadlines and returns how many were called.  A timer is never called before
+    # its deadline.  Repeating timers are kept on their schedule unless they fell a
+    # whole interval behind.
+    ##################################################################################
+    @classmethod
+    def run(cls):
+        now = monotonic()
+        due = []
+        with cls.lock:
+            while True:
+                deadline = cls.get_next()
+                if deadline is None or deadline > now:
+                    break
+                entry = heapq.heappop(cls.entries)[2]
+                entry.queued = None
+                due.append(entry)
+            for entry in due:
+                if entry.interval:
+                    entry.deadline += entry.interval
+                    if entry.deadline <= now:
+                        entry.deadline = now + entry.interval
+                    cls.push(entry)
+                else:
+                    entry.deadline = None
+        for entry in due:
+            entry.calls += 1
+            cls.fired += 1
+            entry.function(*entry.args)
+        return len(due)
 
 
 ##################################################################################
@@ -915,37 +2069,236 @@ def draw_true_rect(screen, color, x, y, width, height, border_width):
 # list.  This will take text and determine if it fits in the specified width
 # parameter.  Newline characters also create breaks.  The return is a tuple that
 # contains each text line along with the text, height (should be the same) and
-# width of each.
-##################################################################################
-def wrap_text_line(font, text, width):
+# width of each.  The font can either be a pygame.freetype.Font or a font path,
+# in which case the font is taken from the FontCache using font_size and
+# font_style.  The text is measured once per word instead of once per character,
+# so the time taken grows linearly with the length of the text.  Widths are added
+# up from the FontMetrics table of the font when it has one.
+##################################################################################
+def wrap_text_line(font, text, width, font_size=None, font_style=None):
+    if not isinstance(font, pygame.freetype.Font):
+        font = FontCache.get_font(font, font_size, font_style)
     text_lines = []
     text_height = []
     text_width = []
-    i = 1
-    # A few random words and symbols that have ascenders and descenders
-    max_height = font.get_rect("jet Mopping quiT!([}|/").height
-    while text:
-        font_rect = font.get_rect(text[:i])
-        # Loop through the words until we exceed the width, run out of characters,
-        # run out of spaces or run out of words.
-        while (font_rect.width < width and i < len(text) and "\n" not in text[:i]) or\
-                (" " not in text[:i] and text[:i] is not text):
-            i += 1
-            font_rect = font.get_rect(text[:i])
-        # if we've wrapped the text, then adjust the wrap to the last word
-        if "\n" in text[:i]:
-            i = text.find("\n", 0, i) + 1
-        elif i < len(text):
-            i = text.rfind(" ", 0, i) + 1
-        line_text = text[:i].strip("\n")
-        text_rect = font.get_rect(line_text)
+    metrics = FontMetrics.get_metrics(font)
+    if metrics is not None:
+        max_height = metrics.get_line_height()
+    else:
+        # A few random words and symbols that have ascenders and descenders
+        max_height = font.get_rect("jet Mopping quiT!([}|/").height
+    length = len(text)
+    start = 0
+    # The search for the end of each line starts at the length of the line before
+    # it (1 for the first line), which is kept so the lines break as they always
+    # have.
+    line_length = 1
+    newline = text.find("\n")
+    while start < length:
+        if -1 < newline < start:
+            newline = text.find("\n", start)
+        # A line ends at the next newline (which is kept) or the end of the text.
+        limit = (newline + 1 if newline != -1 else length) - start
+        # Words are never split, so a line is at least the first word.
+        space = text.find(" ", start, start + limit)
+        first = max(line_length, space - start + 1 if space != -1 else limit)
+        if first >= limit:
+            line_length = newline - start + 1 if newline != -1 else first
+        else:
+            # Text width only grows as characters are added, so the width is measured
+            # once at the end of each word to find the last one that fits.
+            last_space = text.rfind(" ", start, start + first)
+            if metrics is not None:
+                get_width = metrics.get_ruler(text, start).get_width
+            else:
+                get_width = lambda end: font.get_rect(text[start:end]).width
+            overflow = False
+            space = text.find(" ", start + first, start + limit)
+            while space != -1:
+                if get_width(space) >= width:
+                    overflow = True
+                    break
+                last_space = space
+                space = text.find(" ", space + 1, start + limit)
+            else:
+                overflow = get_width(start + limit - 1) >= width
+            if overflow:
+                line_length = last_space - start + 1
+            else:
+                line_length = limit
+        line_text = text[start:start + line_length].strip("\n")
         text_lines.append(line_text)
         text_height.append(max_height)
-        text_width.append(text_rect.width)
-        text = text[i:]
+        text_width.append(metrics.get_width(line_text) if metrics is not None else font.get_rect(line_text).width)
+        start += line_length
     return text_lines, text_height, text_width
 
 
+##################################################################################
+# TEXT PAGER CLASS
+##################################################################################
+# Class that splits a long text into pages of wrapped lines without wrapping or
+# reading more of it than is needed.  The text is either a string (or list of
+# lines) kept in memory or the path of a file, which is read a line at a time
+# from disk, so files of any size can be paged.  The start of each page (the
+# position of its first line in the source and the number of wrapped lines of it
+# shown on the page before) is kept in an index as the pages are reached, so
+# going back to any page already seen only wraps that page.  The index is dropped
+# when the font, width or lines per page change.
+##################################################################################
+class TextPager(object):
+    text_lines = None
+    path = None
+    encoding = None
+    pages = None
+    complete = False
+    layout_key = None
+    font = None
+    width = 0
+    lines_per_page = 1
+    wrapped = None
+    last_page = None
+
+    ##################################################################################
+    # TEXT PAGER INIT METHOD
+    ##################################################################################
+    # Initializes the pager with either the text or the path of a text file (read
+    # with the encoding passed in).
+    ##################################################################################
+    def __init__(self, text=None, path=None, encoding="utf-8"):
+        if text is not None:
+            if isinstance(text, basestring):
+                text = text.splitlines()
+            self.text_lines = [unicode(text_line) for text_line in text]
+        elif path is None:
+            self.text_lines = []
+        self.path = path
+        self.encoding = encoding
+        self.pages = [(0, 0)]
+
+    ##################################################################################
+    # TEXT PAGER SET_LAYOUT METHOD
+    ##################################################################################
+    # Sets the font, width and number of lines of a page.  The page index is
+    # started again if any of them changed.
+    ##################################################################################
+    def set_layout(self, font, width, lines_per_page):
+        layout_key = (font.path, font.size, font.style, font.pad, width, lines_per_page)
+        if layout_key == self.layout_key:
+            return
+        self.layout_key = layout_key
+        self.font = font
+        self.width = width
+        self.lines_per_page = max(lines_per_page, 1)
+        self.pages = [(0, 0)]
+        self.complete = False
+        self.wrapped = None
+        self.last_page = None
+
+    ##################################################################################
+    # TEXT PAGER READ_LINES METHOD
+    ##################################################################################
+    # Generator that returns each line of the source from the position passed in
+    # along with the position of the line after it.  Positions are byte offsets for
+    # a file and list indexes for text in memory.
+    ##################################################################################
+    def read_lines(self, position):
+        if self.text_lines is not None:
+            for index in range(position, len(self.text_lines)):
+                yield self.text_lines[index], index + 1
+            return
+        with io.open(self.path, "rb") as text_file:
+            text_file.seek(position)
+            while True:
+                text_line = text_file.readline()
+                if not text_line:
+                    return
+                yield text_line.decode(self.encoding, "replace").rstrip(u"\r\n"), text_file.tell()
+
+    ##################################################################################
+    # TEXT PAGER WRAP METHOD
+    ##################################################################################
+    # Returns the wrapped lines of the source line at the position passed in.  The
+    # line is wrapped with its newline so the width of its last word is measured.
+    # The last line wrapped is kept, as a line longer than a page is wrapped for
+    # each of its pages.
+    ##################################################################################
+    def wrap(self, position, text_line):
+        if self.wrapped is None or self.wrapped[0] != position:
+            wrapped_lines = wrap_text_line(self.font, text_line.expandtabs() + u"\n", self.width)[0] \
+                if text_line else []
+            self.wrapped = (position, wrapped_lines or [u""])
+        return self.wrapped[1]
+
+    ##################################################################################
+    # TEXT PAGER BUILD_PAGE METHOD
+    ##################################################################################
+    # Returns the wrapped lines of the page starting at the position and skip
+    # passed in and the start of the next page, or None if it is the last page.
+    ##################################################################################
+    def build_page(self, start):
+        position, skip = start
+        page_lines = []
+        next_start = None
+        for text_line, next_position in self.read_lines(position):
+            if len(page_lines) == self.lines_per_page:
+                next_start = (position, 0)
+                break
+            wrapped_lines = self.wrap(position, text_line)
+            needed = self.lines_per_page - len(page_lines)
+            if len(wrapped_lines) - skip > needed:
+                page_lines.extend(wrapped_lines[skip:skip + needed])
+                next_start = (position, skip + needed)
+                break
+            page_lines.extend(wrapped_lines[skip:])
+            skip = 0
+            position = next_position
+        return page_lines, next_start
+
+    ##################################################################################
+    # TEXT PAGER INDEX_TO METHOD
+    ##################################################################################
+    # Finds the start of pages up to the page passed in (or of every page if it is
+    # None).  Returns the last page that exists up to that page.
+    ##################################################################################
+    def index_to(self, page=None):
+        while not self.complete and (page is None or page >= len(self.pages)):
+            page_lines, next_start = self.build_page(self.pages[-1])
+            if next_start is None:
+                self.complete = True
+            else:
+                self.pages.append(next_start)
+        if page is None or page >= len(self.pages):
+            return len(self.pages) - 1
+        return max(page, 0)
+
+    ##################################################################################
+    # TEXT PAGER GET_PAGE METHOD
+    ##################################################################################
+    # Returns the number of the page passed in (moved to the last page if there are
+    # not that many) and a list of its wrapped lines.  Only the text of that page is
+    # read and wrapped, apart from the pages before it that have not been indexed.
+    ##################################################################################
+    def get_page(self, page):
+        page = self.index_to(page)
+        if self.last_page is None or self.last_page[0] != page:
+            page_lines, next_start = self.build_page(self.pages[page])
+            if next_start is None:
+                self.complete = True
+            elif page == len(self.pages) - 1:
+                self.pages.append(next_start)
+            self.last_page = (page, page_lines)
+        return self.last_page
+
+    ##################################################################################
+    # TEXT PAGER GET_PAGE_COUNT METHOD
+    ##################################################################################
+    # Returns the number of pages, indexing the whole text if it has not been yet.
+    ##################################################################################
+    def get_page_count(self):
+        return self.index_to() + 1
+
+
 ##################################################################################
 # GET_BUTTONS_START_HEIGHT METHOD
 ##################################################################################